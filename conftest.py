@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_caches(django_test_environment):
+    """pytest, как и manage.py test, работает с кешем в памяти."""
+    from django.test.utils import override_settings
+
+    from core.runner import TEST_CACHES
+
+    with override_settings(CACHES=TEST_CACHES):
+        yield
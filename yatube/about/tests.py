@@ -1,10 +1,12 @@
 from django.test import TestCase, Client
 from http import HTTPStatus
 from django.urls import reverse
+from django.core.cache import cache
 
 
 class StaticPagesURLTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_pages_exist_at_desired_location(self):
@@ -33,6 +35,7 @@ class StaticPagesURLTests(TestCase):
 class StaticPagesViewsTest:
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_pages_uses_correct_template(self):
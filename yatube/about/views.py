@@ -1,10 +1,15 @@
 # from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.decorators import cache_anonymous
 
+
+@method_decorator(cache_anonymous(), name='dispatch')
 class AboutAuthorView(TemplateView):
     template_name = 'about/author.html'
 
 
+@method_decorator(cache_anonymous(), name='dispatch')
 class AboutTechView(TemplateView):
     template_name = 'about/tech.html'
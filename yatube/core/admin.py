@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at',
+                    'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('attempts', 'locked_at', 'lock', 'last_error',
+                       'created_at')
+    actions = ('retry_now',)
+
+    def retry_now(self, request, queryset):
+        queryset.update(status=Job.PENDING, run_at=timezone.now(),
+                        attempts=0, lock='', locked_at=None)
+    retry_now.short_description = 'Повторить сейчас'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,50 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def response_cache_key(request, version):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'core:response:{path}:{version}'
+
+
+def cache_anonymous(version_func=None, timeout=None):
+    """Кеширует ответ целиком для гостей без cookie.
+
+    Кешируются только GET-запросы без cookie: у такого посетителя
+    нет ни сессии, ни CSRF-токена, и страница для всех одинакова.
+    version_func(request, *args, **kwargs) добавляет в ключ версию
+    содержимого, например ETag ленты; None значит "не кешировать".
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.COOKIES:
+                response = view(request, *args, **kwargs)
+                patch_vary_headers(response, ('Cookie',))
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True)
+                return response
+            version = (version_func(request, *args, **kwargs)
+                       if version_func else '')
+            key = response_cache_key(request, version)
+            response = cache.get(key) if version is not None else None
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(
+                        response.render):
+                    response = response.render()
+                if (version is not None and response.status_code == 200
+                        and not response.streaming and not response.cookies):
+                    lifetime = (settings.ANONYMOUS_CACHE_TIMEOUT
+                                if timeout is None else timeout)
+                    patch_cache_control(response, public=True,
+                                        max_age=lifetime)
+                    patch_vary_headers(response, ('Cookie',))
+                    cache.set(key, response, lifetime)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,121 @@
+"""Очередь фоновых задач в таблице core.Job.
+
+Задача регистрируется декоратором @job и получает список параметров
+всех задач своего типа, взятых воркером за раз. enqueue() пишет строку
+в текущей транзакции: воркер увидит задачу только после коммита,
+а откаченная запись не оставит после себя задачи. Упавшая пачка
+повторяется по одной задаче с экспоненциальной задержкой.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def job(name, batch_size=None):
+    """Регистрирует обработчик handler(payloads) задач name."""
+    def decorator(handler):
+        handler.job_name = name
+        handler.batch_size = batch_size
+        handlers[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(name, payload, delay=0):
+    """Ставит задачу в очередь; с JOBS_EAGER выполняет ее сразу."""
+    data = json.dumps(payload)
+    if settings.JOBS_EAGER:
+        handlers[name]([json.loads(data)])
+        return None
+    return Job.objects.create(
+        name=name, payload=data,
+        run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def due_jobs(now):
+    """Задачи, которые пора выполнить, включая брошенные воркерами."""
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        Q(status=Job.PENDING) | Q(status=Job.RUNNING, locked_at__lt=stale),
+        run_at__lte=now,
+    )
+
+
+def claim(batch_size=None):
+    """Забирает пачку готовых задач одного типа: (name, [Job])."""
+    now = timezone.now()
+    due = due_jobs(now).order_by('run_at', 'pk')
+    name = due.values_list('name', flat=True).first()
+    if name is None:
+        return None, []
+    handler = handlers.get(name)
+    size = (batch_size or getattr(handler, 'batch_size', None)
+            or settings.JOBS_BATCH_SIZE)
+    ids = list(due.filter(name=name).values_list('pk', flat=True)[:size])
+    lock = uuid.uuid4().hex
+    # Повторная проверка в UPDATE не дает двум воркерам взять одну задачу
+    due_jobs(now).filter(pk__in=ids).update(
+        status=Job.RUNNING, locked_at=now, lock=lock)
+    return name, list(Job.objects.filter(lock=lock).order_by('pk'))
+
+
+def retry(jobs, error):
+    now = timezone.now()
+    for item in jobs:
+        item.attempts += 1
+        item.last_error = error
+        item.lock = ''
+        item.locked_at = None
+        if item.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            item.status = Job.FAILED
+        else:
+            item.status = Job.PENDING
+            item.run_at = now + timedelta(seconds=(
+                settings.JOBS_RETRY_DELAY * 2 ** (item.attempts - 1)))
+        item.save(update_fields=['attempts', 'last_error', 'lock',
+                                 'locked_at', 'status', 'run_at'])
+
+
+def run_batch(name, jobs):
+    """Выполняет пачку задач; возвращает число выполненных."""
+    try:
+        handler = handlers.get(name)
+        if handler is None:
+            raise LookupError(f'Нет обработчика задачи {name}')
+        with transaction.atomic():
+            # Удаляем задачи в той же транзакции, что и их результат.
+            # Запись идет первой: в SQLite переход от чтения к записи
+            # не ждет блокировку и падает с "database is locked"
+            Job.objects.filter(pk__in=[item.pk for item in jobs]).delete()
+            handler([json.loads(item.payload) for item in jobs])
+    except Exception:
+        if len(jobs) > 1:
+            # Одна плохая задача не должна держать всю пачку
+            return sum(run_batch(name, [item]) for item in jobs)
+        logger.exception('Задача %s #%s упала', name, jobs[0].pk)
+        retry(jobs, traceback.format_exc())
+        return 0
+    return len(jobs)
+
+
+def run_pending(batch_size=None):
+    """Выполняет в текущем потоке все готовые задачи."""
+    done = 0
+    while True:
+        name, jobs = claim(batch_size)
+        if not jobs:
+            return done
+        done += run_batch(name, jobs)
@@ -0,0 +1,53 @@
+"""Отправка почты через очередь задач.
+
+QueuedEmailBackend только кладет готовые письма в очередь и сразу
+возвращает управление. Воркер run_jobs отправляет их пачками через
+EMAIL_DELIVERY_BACKEND, открывая одно соединение (или один файл
+у filebased) на всю пачку.
+"""
+import base64
+from email import message_from_bytes
+from email.message import Message
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import MIMEMixin
+
+from .jobs import enqueue, job
+
+
+class RawMIMEMessage(MIMEMixin, Message):
+    """Разобранное письмо с as_bytes(linesep=...), как у SafeMIMEText."""
+
+
+class QueuedMessage(EmailMessage):
+    """Письмо из очереди: готовый MIME-текст и адреса получателей."""
+
+    def __init__(self, from_email, recipients, subject, raw):
+        super().__init__(subject=subject, from_email=from_email,
+                         to=recipients)
+        self.raw = base64.b64decode(raw)
+
+    def message(self):
+        return message_from_bytes(self.raw, _class=RawMIMEMessage)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            enqueue('core.send_mail', {
+                'from_email': message.from_email,
+                'recipients': message.recipients(),
+                'subject': message.subject,
+                'raw': base64.b64encode(
+                    message.message().as_bytes()).decode(),
+            })
+        return len(email_messages)
+
+
+@job('core.send_mail')
+def deliver(payloads):
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    connection.send_messages(
+        [QueuedMessage(**payload) for payload in payloads])
@@ -0,0 +1,76 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.timing import BENCH_CACHES, QueryTimer
+from posts.models import Post, User
+
+MODES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'],
+    },
+    # Текущие настройки проекта
+    'cached': {},
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает число запросов к БД на запрос вошедшего '
+            'пользователя с сессиями и пользователями из БД и из кеша')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+
+    @override_settings(CACHES=BENCH_CACHES)
+    def handle(self, *args, iterations, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            cache.clear()
+            user = User.objects.create_user(username='bench')
+            Post.objects.create(author=user, text='Пост для замера')
+            urls = [
+                reverse('posts:index'),
+                reverse('posts:profile', kwargs={'username': 'bench'}),
+                reverse('posts:post_create'),
+            ]
+            rows = []
+            for url in urls:
+                row = {'url': url}
+                for mode, overrides in MODES.items():
+                    with override_settings(**overrides):
+                        row[mode] = self.measure(user, url, iterations)
+                rows.append(row)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.report(rows)
+
+    def measure(self, user, url, iterations):
+        client = Client()
+        client.force_login(user)
+        client.get(url)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            for _ in range(iterations):
+                client.get(url)
+        elapsed = time.perf_counter() - start
+        return timer.count / iterations, elapsed / iterations * 1000
+
+    def report(self, rows):
+        header = (f'{"url":<24}{"db q":>8}{"cached q":>10}'
+                  f'{"db ms":>10}{"cached ms":>11}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            self.stdout.write(
+                f'{row["url"]:<24}{row["db"][0]:>8.1f}'
+                f'{row["cached"][0]:>10.1f}{row["db"][1]:>10.2f}'
+                f'{row["cached"][1]:>11.2f}')
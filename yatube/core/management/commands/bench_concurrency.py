@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from core.timing import BENCH_CACHES
+from posts.models import Post, User
+
+
+class Worker(threading.Thread):
+    """Поток, повторяющий операцию до истечения времени замера."""
+
+    def __init__(self, operation, deadline):
+        super().__init__(daemon=True)
+        self.operation = operation
+        self.deadline = deadline
+        self.done = self.locked = 0
+
+    def run(self):
+        try:
+            while time.monotonic() < self.deadline:
+                try:
+                    self.operation()
+                except OperationalError:
+                    self.locked += 1
+                else:
+                    self.done += 1
+        finally:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет чтения и записи в SQLite из нескольких потоков '
+            'без PRAGMA и с SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--posts', type=int, default=2000)
+
+    @override_settings(CACHES=BENCH_CACHES)
+    def handle(self, *args, **options):
+        rows = [('default', self.run_mode({}, options)),
+                ('SQLITE_PRAGMAS', self.run_mode(None, options))]
+        header = (f'{"mode":<16}{"reads/s":>10}{"writes/s":>10}'
+                  f'{"locked":>10}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for mode, result in rows:
+            self.stdout.write(
+                f'{mode:<16}{result["reads"]:>10.0f}'
+                f'{result["writes"]:>10.0f}{result["locked"]:>10}')
+
+    def run_mode(self, pragmas, options):
+        """Замер на новой файловой базе; pragmas=None - из настроек."""
+        overrides = {} if pragmas is None else {'SQLITE_PRAGMAS': pragmas}
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(**overrides):
+            connection.settings_dict['TEST'] = {
+                **connection.settings_dict.get('TEST', {}),
+                'NAME': os.path.join(directory, 'bench.sqlite3'),
+            }
+            connection.creation.create_test_db(verbosity=0,
+                                               autoclobber=True)
+            try:
+                author = self.seed(options['posts'])
+                return self.run_workers(author, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, number):
+        author = User.objects.create_user(username='bench')
+        Post.objects.bulk_create(
+            [Post(author=author, text=f'Пост {num}') for num in range(number)],
+            batch_size=500)
+        return author
+
+    def run_workers(self, author, options):
+        def read():
+            list(Post.objects.feed()[:10])
+
+        def write():
+            Post.objects.create(author=author, text='Новый пост')
+
+        connections.close_all()
+        deadline = time.monotonic() + options['seconds']
+        readers = [Worker(read, deadline) for _ in range(options['readers'])]
+        writers = [Worker(write, deadline)
+                   for _ in range(options['writers'])]
+        for worker in readers + writers:
+            worker.start()
+        for worker in readers + writers:
+            worker.join()
+        return {
+            'reads': sum(w.done for w in readers) / options['seconds'],
+            'writes': sum(w.done for w in writers) / options['seconds'],
+            'locked': sum(w.locked for w in readers + writers),
+        }
@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import claim, run_batch
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Job пулом потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int,
+                            default=settings.JOBS_WORKER_THREADS)
+        parser.add_argument('--batch-size', type=int,
+                            help='Сколько задач одного типа брать за раз')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда готовых задач не останется')
+
+    def handle(self, *args, threads, batch_size, poll, once, **options):
+        self.done = 0
+        running = set()
+        with ThreadPoolExecutor(threads) as pool:
+            try:
+                while True:
+                    while len(running) < threads:
+                        name, jobs = claim(batch_size)
+                        if not jobs:
+                            break
+                        running.add(pool.submit(self.work, name, jobs))
+                    if running:
+                        finished, running = wait(
+                            running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            self.done += future.result()
+                    elif once:
+                        break
+                    else:
+                        time.sleep(poll)
+            except KeyboardInterrupt:
+                # Взятые задачи дорабатываются при выходе из пула
+                self.stderr.write('Остановка: ждем начатые задачи')
+        self.stdout.write(f'Выполнено задач: {self.done}')
+
+    def work(self, name, jobs):
+        close_old_connections()
+        try:
+            return run_batch(name, jobs)
+        finally:
+            close_old_connections()
@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import routers, timing
+
+logger = logging.getLogger('core.performance')
+
+PIN_COOKIE = 'primary_pin'
+
+
+class ReplicaPinMiddleware:
+    """Читать свои записи: после записи запросы идут в основную базу.
+
+    Небезопасные методы всегда читают основную базу. Если запрос что-то
+    записал, cookie закрепляет посетителя за основной базой на
+    DATABASE_PRIMARY_PIN_SECONDS, пока реплики догоняют.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                or PIN_COOKIE in request.COOKIES):
+            routers.pin_to_primary()
+        try:
+            response = self.get_response(request)
+            if routers.has_written() and routers.replicas():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.DATABASE_PRIMARY_PIN_SECONDS,
+                    httponly=True)
+        finally:
+            routers.reset()
+        return response
+
+
+class PerformanceMiddleware:
+    """Замеряет запрос и отдает замеры в заголовке Server-Timing.
+
+    Запросы дольше PERF_SLOW_REQUEST_MS попадают в кольцевой буфер
+    timing.slow_requests (его показывает страница для персонала)
+    и в журнал core.performance.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.start()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.queries))
+                response = self.get_response(request)
+        finally:
+            timing.stop()
+        record = {
+            'at': timezone.now(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view_name': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'total_ms': (time.perf_counter() - start) * 1000,
+            'sql_ms': timings.queries.seconds * 1000,
+            'queries': timings.queries.count,
+            'template_ms': timings.template_seconds * 1000,
+        }
+        response['Server-Timing'] = server_timing(record)
+        if record['total_ms'] >= settings.PERF_SLOW_REQUEST_MS:
+            timing.slow_requests.append(record)
+            logger.warning(
+                '%(method)s %(path)s view=%(view_name)s status=%(status)s '
+                'total=%(total_ms).1fms sql=%(sql_ms).1fms/%(queries)s '
+                'template=%(template_ms).1fms', record)
+        return response
+
+
+def server_timing(record):
+    return ', '.join([
+        f'sql;dur={record["sql_ms"]:.1f};desc="{record["queries"]} queries"',
+        f'tpl;dur={record["template_ms"]:.1f};desc="without SQL"',
+        f'view;dur={record["total_ms"]:.1f};desc="{record["view_name"]}"',
+    ])
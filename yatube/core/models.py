@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """Отложенная задача для воркера run_jobs."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ждет'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Параметры (JSON)')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING, verbose_name='Состояние')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    run_at = models.DateTimeField(verbose_name='Выполнить после')
+    locked_at = models.DateTimeField(null=True, blank=True,
+                                     verbose_name='Взята воркером')
+    lock = models.CharField(max_length=32, blank=True,
+                            verbose_name='Метка воркера')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Создана')
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+            models.Index(fields=['lock'], name='job_lock_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
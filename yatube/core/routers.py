@@ -0,0 +1,73 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+def pin_to_primary():
+    """Направляет чтения текущего потока в основную базу."""
+    _state.pinned = True
+
+
+def reset():
+    _state.pinned = False
+    _state.written = False
+
+
+@contextmanager
+def primary():
+    """Внутри блока все чтения идут в основную базу."""
+    pinned = is_pinned()
+    pin_to_primary()
+    try:
+        yield
+    finally:
+        _state.pinned = pinned
+
+
+class PrimaryReplicaRouter:
+    """Читает с реплик из DATABASE_REPLICAS, пишет в основную базу.
+
+    После первой записи поток до конца запроса читает только основную
+    базу, а ReplicaPinMiddleware продлевает это на следующие запросы.
+    """
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or is_pinned():
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        _state.written = True
+        pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *replicas()}
+        if {obj1._state.db, obj2._state.db} <= pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
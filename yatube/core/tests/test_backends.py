@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+
+from ..backends import user_cache_key
+
+
+class CachedSessionUserTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='auth', password='pass')
+        self.url = reverse('posts:post_create')
+
+    def test_session_and_user_come_from_cache(self):
+        """Повторный запрос не читает сессию и пользователя из БД"""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse([
+            query for query in queries
+            if 'django_session' in query['sql']
+            or 'FROM "auth_user"' in query['sql']
+        ])
+
+    def test_user_save_invalidates_cache(self):
+        """Сохранение пользователя сбрасывает его копию в кеше"""
+        self.client.get(self.url)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        User.objects.get(pk=self.user.pk).save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_logout_ends_cached_session(self):
+        """После выхода закешированная сессия не действует"""
+        self.client.get(self.url)
+        self.client.post(reverse('users:logout'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля завершает другие сессии пользователя"""
+        other = self.client_class()
+        other.login(username='auth', password='pass')
+        other.get(self.url)
+        response = self.client.post(reverse('users:password_change_form'), {
+            'old_password': 'pass',
+            'new_password1': 'N3w-secret-pass',
+            'new_password2': 'N3w-secret-pass',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(other.get(self.url).status_code, 302)
+
+    def test_failed_login_hashes_once(self):
+        """Неверный пароль проверяется одним хешированием"""
+        with mock.patch('django.contrib.auth.base_user.check_password',
+                        return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='auth', password='bad'))
+        check_password.assert_called_once()
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..db import apply_sqlite_pragmas
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234,
+                                       'temp_store': 'MEMORY'})
+    def test_pragmas_applied_to_connection(self):
+        """PRAGMA из настроек применяются к подключению"""
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('temp_store'), 2)
+
+    def test_new_connections_are_configured(self):
+        """Подключение тестов уже настроено обработчиком сигнала"""
+        self.assertEqual(self.pragma('busy_timeout'),
+                         settings.SQLITE_PRAGMAS['busy_timeout'])
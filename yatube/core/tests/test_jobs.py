@@ -0,0 +1,128 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..jobs import claim, enqueue, job, run_pending
+from ..models import Job
+
+calls = []
+
+
+@job('core.tests.record', batch_size=3)
+def record(payloads):
+    calls.append([payload['num'] for payload in payloads])
+
+
+@job('core.tests.fail_on_bad')
+def fail_on_bad(payloads):
+    if any(payload.get('bad') for payload in payloads):
+        raise ValueError('Плохая задача')
+    calls.append(len(payloads))
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3,
+                   JOBS_RETRY_DELAY=10, JOBS_LOCK_TIMEOUT=60)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_of_one_type_run_in_batches(self):
+        """Задачи одного типа выполняются пачками по batch_size"""
+        for num in range(5):
+            enqueue('core.tests.record', {'num': num})
+        self.assertEqual(run_pending(), 5)
+        self.assertEqual(calls, [[0, 1, 2], [3, 4]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_rolled_back_write_leaves_no_job(self):
+        """Задача появляется только вместе с закоммиченной записью"""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue('core.tests.record', {'num': 1})
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_delayed_job_waits(self):
+        """Отложенная задача не берется раньше срока"""
+        enqueue('core.tests.record', {'num': 1}, delay=60)
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(calls, [])
+
+    def test_bad_job_is_retried_with_backoff(self):
+        """Упавшая задача повторяется с растущей задержкой"""
+        enqueue('core.tests.fail_on_bad', {})
+        bad = enqueue('core.tests.fail_on_bad', {'bad': True})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(run_pending(), 1)
+        # Соседняя задача из пачки выполнилась отдельно
+        self.assertEqual(calls, [1])
+        failed_at = timezone.now()
+        for attempt, delay in ((1, 10), (2, 20)):
+            bad.refresh_from_db()
+            self.assertEqual((bad.status, bad.attempts),
+                             (Job.PENDING, attempt))
+            self.assertIn('Плохая задача', bad.last_error)
+            self.assertAlmostEqual(
+                (bad.run_at - failed_at).total_seconds(), delay, delta=5)
+            failed_at = bad.run_at
+            with mock.patch('django.utils.timezone.now',
+                            return_value=bad.run_at):
+                with self.assertLogs('core.jobs', 'ERROR'):
+                    run_pending()
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (Job.FAILED, 3))
+        self.assertEqual(run_pending(), 0)
+
+    def test_abandoned_job_is_claimed_again(self):
+        """Задачу упавшего воркера берут снова после JOBS_LOCK_TIMEOUT"""
+        enqueue('core.tests.record', {'num': 1})
+        name, jobs = claim()
+        self.assertEqual((name, len(jobs)), ('core.tests.record', 1))
+        self.assertEqual(claim(), (None, []))
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(len(claim()[1]), 1)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_at_once(self):
+        """С JOBS_EAGER задача выполняется без очереди"""
+        enqueue('core.tests.record', {'num': 7})
+        self.assertEqual(calls, [[7]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_command(self):
+        """run_jobs --once выполняет очередь пулом потоков и выходит"""
+        for num in range(4):
+            enqueue('core.tests.record', {'num': num})
+        output = StringIO()
+        # Потоки открыли бы свои соединения мимо транзакции теста
+        command = 'core.management.commands.run_jobs'
+        with mock.patch(f'{command}.ThreadPoolExecutor', InlineExecutor), \
+                mock.patch(f'{command}.close_old_connections'):
+            call_command('run_jobs', once=True, threads=2, stdout=output)
+        self.assertIn('Выполнено задач: 4', output.getvalue())
+        self.assertEqual(sorted(sum(calls, [])), [0, 1, 2, 3])
+
+
+class InlineExecutor:
+    """ThreadPoolExecutor, выполняющий задачи в вызывающем потоке."""
+
+    def __init__(self, workers):
+        self.workers = workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
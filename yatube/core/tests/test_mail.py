@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from ..jobs import run_pending
+from ..models import Job
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    JOBS_EAGER=False,
+)
+class QueuedEmailBackendTest(TestCase):
+    def test_messages_are_queued_and_sent_in_batch(self):
+        """Письма уходят воркером одной пачкой через одно соединение"""
+        for num in range(3):
+            mail.send_mail(f'Письмо {num}', 'Текст письма',
+                           'from@yatube.ru', [f'user{num}@yatube.ru'])
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.filter(name='core.send_mail').count(), 3)
+        with mock.patch('core.mail.get_connection',
+                        wraps=mail.get_connection) as get_connection:
+            self.assertEqual(run_pending(), 3)
+        get_connection.assert_called_once()
+        self.assertEqual([message.recipients() for message in mail.outbox],
+                         [[f'user{num}@yatube.ru'] for num in range(3)])
+        body = mail.outbox[0].message().get_payload(decode=True).decode()
+        self.assertEqual(body, 'Текст письма')
+
+    @override_settings(
+        EMAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend')
+    def test_smtp_delivery_uses_one_session(self):
+        """SMTP-бэкенд отправляет пачку писем за одну сессию"""
+        for num in range(2):
+            mail.send_mail(f'Письмо {num}', 'Текст письма',
+                           'from@yatube.ru', [f'user{num}@yatube.ru'])
+        with mock.patch('smtplib.SMTP') as smtp:
+            self.assertEqual(run_pending(), 2)
+        smtp.assert_called_once()
+        sendmail = smtp.return_value.sendmail
+        self.assertEqual(
+            [call.args[1] for call in sendmail.call_args_list],
+            [[f'user{num}@yatube.ru'] for num in range(2)])
+        raw = sendmail.call_args_list[0].args[2]
+        self.assertIn(b'\r\nTo: user0@yatube.ru\r\n', raw)
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from .. import timing
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        timing.slow_requests.clear()
+
+    def test_server_timing_header(self):
+        """Ответ содержит SQL, шаблоны и имя представления"""
+        response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for part in ('sql;dur=', 'tpl;dur=', 'desc="posts:index"'):
+            with self.subTest(part=part):
+                self.assertIn(part, header)
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_recorded(self):
+        """Запросы дольше порога попадают в кольцевой буфер и журнал"""
+        with self.assertLogs('core.performance', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('view=posts:index', logs.output[0])
+        record = timing.slow_requests[-1]
+        self.assertEqual(record['view_name'], 'posts:index')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_template_time_excludes_lazy_sql(self):
+        """Запросы во время отрисовки не входят во время шаблонов"""
+        timings = timing.start()
+
+        def lazy_query():
+            timings.queries.seconds += 10
+            return ''
+        try:
+            engines.all()[0].from_string('{{ query }}').render(
+                {'query': lazy_query})
+        finally:
+            timing.stop()
+        self.assertLess(timings.template_seconds, 1)
+
+    def test_fast_requests_are_not_recorded(self):
+        """Быстрые запросы в буфер не попадают"""
+        self.client.get(reverse('about:author'))
+        self.assertFalse(timing.slow_requests)
+
+
+class SlowRequestsReportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='auth')
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_staff_sees_slowest_endpoints(self):
+        """Персонал видит медленные представления"""
+        timing.slow_requests.clear()
+        with self.assertLogs('core.performance', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+            self.client.force_login(self.staff)
+            response = self.client.get(reverse('core:slow_requests'))
+        self.assertContains(response, 'posts:index')
+
+    def test_page_is_staff_only(self):
+        """Обычный пользователь отправляется на вход в админку"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:slow_requests'))
+        self.assertRedirects(
+            response,
+            reverse('admin:login') + '?next='
+            + reverse('core:slow_requests'))
@@ -0,0 +1,81 @@
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import routers
+from ..middleware import PIN_COOKIE, ReplicaPinMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTest(TestCase):
+    def setUp(self):
+        routers.reset()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def test_reads_go_to_replica(self):
+        """Чтения без записей идут на реплику"""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_write_pins_reads_to_primary(self):
+        """После записи поток читает основную базу"""
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_primary_block(self):
+        """Блок primary() временно закрепляет чтения за основной базой"""
+        with routers.primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        """Миграции применяются только к основной базе"""
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_primary(self):
+        """Без реплик все читается из основной базы"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPinMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def read_alias(self, request):
+        aliases = []
+
+        def view(request):
+            aliases.append(routers.PrimaryReplicaRouter().db_for_read(Post))
+            return HttpResponse()
+
+        ReplicaPinMiddleware(view)(request)
+        return aliases[0]
+
+    def test_pin_cookie_routes_reads_to_primary(self):
+        """С cookie закрепления чтения идут в основную базу"""
+        factory = RequestFactory()
+        self.assertEqual(self.read_alias(factory.get('/')), 'replica')
+        factory.cookies[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_alias(factory.get('/')), 'default')
+
+    def test_unsafe_method_reads_primary(self):
+        """POST-запрос читает основную базу"""
+        request = RequestFactory().post('/')
+        self.assertEqual(self.read_alias(request), 'default')
+
+    def test_author_sees_own_post_after_create(self):
+        """После публикации автор видит пост в профиле"""
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('posts:post_create'),
+                               {'text': 'Свежий пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'}))
+        self.assertContains(response, 'Свежий пост')
@@ -0,0 +1,9 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+
+class TestRunnerTest(SimpleTestCase):
+    def test_tests_use_local_cache(self):
+        """Тесты работают с кешем в памяти, а не с кешем сервера"""
+        self.assertIsInstance(caches['default'], LocMemCache)
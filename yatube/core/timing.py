@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+_state = threading.local()
+
+# Последние медленные запросы, самые старые вытесняются
+slow_requests = deque(maxlen=settings.PERF_SLOW_LOG_SIZE)
+
+# Кеш замеров на временной базе: ее id и версии не должны попасть
+# в общий кеш работающего сервера
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench',
+    },
+}
+
+
+class QueryTimer:
+    """execute_wrapper, считающий запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestTimings:
+    """Что успел насчитать текущий запрос."""
+
+    def __init__(self):
+        self.queries = QueryTimer()
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+
+def start():
+    _state.timings = RequestTimings()
+    return _state.timings
+
+
+def stop():
+    _state.timings = None
+
+
+def current():
+    return getattr(_state, 'timings', None)
+
+
+class TimedTemplate(Template):
+    """Шаблон, время отрисовки которого попадает в RequestTimings.
+
+    Вложенные отрисовки (например, карточки постов внутри ленты)
+    уже входят во время внешней и отдельно не считаются. Ленивые
+    запросы, выполненные во время отрисовки, вычитаются: они уже
+    учтены в sql, и tpl с sql не пересекаются.
+    """
+
+    def render(self, context=None, request=None):
+        timings = current()
+        if timings is None:
+            return super().render(context, request)
+        timings.template_depth += 1
+        start = time.perf_counter()
+        sql_start = timings.queries.seconds
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_seconds += (
+                    time.perf_counter() - start
+                    - (timings.queries.seconds - sql_start))
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Движок шаблонов Django, замеряющий время отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
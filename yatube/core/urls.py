@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('slow-requests/', views.slow_requests_report, name='slow_requests'),
+]
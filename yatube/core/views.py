@@ -0,0 +1,37 @@
+from collections import defaultdict
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from .timing import slow_requests
+
+SLOWEST_SHOWN = 50
+
+
+@staff_member_required
+def slow_requests_report(request):
+    """Самые медленные представления по кольцевому буферу запросов."""
+    records = list(slow_requests)
+    by_view = defaultdict(list)
+    for record in records:
+        by_view[record['view_name'] or record['path']].append(record)
+    endpoints = sorted((
+        {
+            'view_name': view_name,
+            'hits': len(rows),
+            'max_ms': max(row['total_ms'] for row in rows),
+            'avg_ms': sum(row['total_ms'] for row in rows) / len(rows),
+            'avg_sql_ms': sum(row['sql_ms'] for row in rows) / len(rows),
+            'avg_queries': sum(row['queries'] for row in rows) / len(rows),
+            'avg_template_ms': (
+                sum(row['template_ms'] for row in rows) / len(rows)),
+        } for view_name, rows in by_view.items()
+    ), key=lambda row: row['max_ms'], reverse=True)
+    slowest = sorted(records, key=lambda row: row['total_ms'],
+                     reverse=True)[:SLOWEST_SHOWN]
+    context = {
+        'title': 'Медленные запросы',
+        'endpoints': endpoints,
+        'slowest': slowest,
+    }
+    return render(request, 'core/slow_requests.html', context)
@@ -1,10 +1,79 @@
+import datetime as dt
+
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
+from django.utils import formats, timezone
+from django.utils.text import capfirst
 
+from . import search
+from .groups import search_groups
 from .models import Post
+from .paginators import EstimatedCountPaginator
+from .widgets import GroupAdminAutocomplete
 
 from .models import Group
 
 
+class PubDateFilter(admin.SimpleListFilter):
+    """Годы и месяцы публикации без агрегатов по всей таблице.
+
+    Встроенный date_hierarchy считает MIN/MAX и SELECT DISTINCT по
+    всем строкам. Здесь берем только первый и последний пост по индексу
+    post_pub_date_idx, а годы и месяцы между ними строим сами.
+    """
+
+    title = 'год и месяц публикации'
+    parameter_name = 'published'
+
+    def bounds(self, queryset):
+        dates = queryset.order_by().values_list('pub_date', flat=True)
+        first = dates.order_by('pub_date').first()
+        last = dates.order_by('-pub_date').first()
+        if first is None:
+            return None
+        return timezone.localtime(first), timezone.localtime(last)
+
+    def lookups(self, request, model_admin):
+        bounds = self.bounds(model_admin.get_queryset(request))
+        if bounds is None:
+            return []
+        first, last = bounds
+        selected = (self.value() or '').split('-')[0]
+        choices = []
+        for year in range(last.year, first.year - 1, -1):
+            choices.append((str(year), str(year)))
+            if str(year) != selected:
+                continue
+            # Месяцы раскрываем только у выбранного года
+            choices += [
+                (f'{year}-{month:02}', capfirst(formats.date_format(
+                    dt.date(year, month, 1), 'YEAR_MONTH_FORMAT')))
+                for month in range(12, 0, -1)
+                if (first.year, first.month) <= (year, month)
+                <= (last.year, last.month)
+            ]
+        return choices
+
+    def queryset(self, request, queryset):
+        try:
+            parts = [int(part) for part in self.value().split('-')]
+            start = dt.datetime(parts[0], parts[1] if len(parts) > 1 else 1,
+                                1)
+            dates = {'pub_date__gte': timezone.make_aware(start)}
+        except (AttributeError, ValueError, IndexError, OverflowError):
+            return queryset
+        if len(parts) > 1 and start.month < 12:
+            year, month = start.year, start.month + 1
+        else:
+            year, month = start.year + 1, 1
+        # Полуинтервал по pub_date читается диапазоном индекса;
+        # у 9999 года верхней границы нет
+        if year <= dt.MAXYEAR:
+            dates['pub_date__lt'] = timezone.make_aware(
+                start.replace(year=year, month=month))
+        return queryset.filter(**dates)
+
+
 class PostAdmin(admin.ModelAdmin):
     list_display = (
         'pk',
@@ -15,10 +84,43 @@ class PostAdmin(admin.ModelAdmin):
     )
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', PubDateFilter)
     empty_value_display = '-пусто-'
+    # Автор и группа одним JOIN, а не запросом на каждую строку
+    list_select_related = ('author', 'group')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Группы подгружаются по мере ввода, а не списком в каждой строке
+    autocomplete_fields = ('group',)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = GroupAdminAutocomplete(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%...%' по всем строкам ищем по индексу FTS5
+        match = search.match_expression(search_term)
+        if not match or not search.is_supported():
+            return super().get_search_results(
+                request, queryset, search_term)
+        ids = RawSQL(search.matching_ids_sql(), (match,))
+        return queryset.filter(id__in=ids), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count')
+    search_fields = ('^title', '^slug')
+    ordering = ('search_title', 'id')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по началу через индексы group_search_title_idx
+        # и group_search_slug_idx
+        return search_groups(queryset, search_term), False
 
 
 admin.site.register(Post, PostAdmin)
 
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
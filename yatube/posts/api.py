@@ -0,0 +1,116 @@
+"""JSON-версии лент и страницы поста.
+
+Посты читаются через values() без создания моделей и отдаются
+постранично по курсору, как курсорный режим HTML-лент.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+
+from .groups import get_group_or_404, search_groups
+from .models import AuthorStats, Group, Post, User
+from .paginators import CursorPaginator
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated_at',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+
+
+def serialize_post(row):
+    name = f"{row['author__first_name']} {row['author__last_name']}"
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'updated_at': row['updated_at'],
+        'author': {'username': row['author__username'],
+                   'name': name.strip()},
+        'group': row['group__slug'] and {'slug': row['group__slug'],
+                                         'title': row['group__title']},
+    }
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={
+        'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def feed_response(request, posts, **extra):
+    paginator = CursorPaginator(posts.values(*POST_FIELDS),
+                                settings.POSTS_SHOWN)
+    page = paginator.get_page(request.GET.get('cursor'))
+
+    def link(cursor):
+        if cursor is None:
+            return None
+        return f'{request.path}?{urlencode({"cursor": cursor})}'
+
+    return json_response({
+        **extra,
+        'results': [serialize_post(row) for row in page],
+        'next': link(page.next_cursor),
+        'previous': link(page.previous_cursor),
+    })
+
+
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    posts_count = Group.objects.filter(pk=group.pk).values_list(
+        'posts_count', flat=True)
+    return feed_response(request, group.posts.all(), group={
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+        'posts_count': posts_count.get(),
+    })
+
+
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    return feed_response(request, author.posts.all(), author={
+        'username': author.username,
+        'name': author.get_full_name(),
+        'posts_count': AuthorStats.posts_count_of(author),
+    })
+
+
+def post_detail(request, post_id):
+    row = get_object_or_404(
+        Post.objects.values(*POST_FIELDS, 'author__stats__posts_count'),
+        pk=post_id)
+    post = serialize_post(row)
+    post['author']['posts_count'] = row['author__stats__posts_count'] or 0
+    return json_response(post)
+
+
+def groups(request):
+    """Группы по началу названия или slug в формате Select2.
+
+    Страница читается по индексу и на одну строку больше, чтобы узнать,
+    есть ли следующая, без COUNT(*). Глубже GROUP_AUTOCOMPLETE_MAX_PAGE
+    не листаем: такой OFFSET дорог, а огромный не влезет в SQLite.
+    """
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    if page > settings.GROUP_AUTOCOMPLETE_MAX_PAGE:
+        return json_response({'results': [], 'pagination': {'more': False}})
+    size = settings.GROUP_AUTOCOMPLETE_SHOWN
+    start = (page - 1) * size
+    rows = list(search_groups(Group.objects.all(), request.GET.get('q', ''))
+                .values_list('id', 'title', 'slug')[start:start + size + 1])
+    return json_response({
+        'results': [{'id': pk, 'text': title, 'slug': slug}
+                    for pk, title, slug in rows[:size]],
+        'pagination': {'more': len(rows) > size
+                       and page < settings.GROUP_AUTOCOMPLETE_MAX_PAGE},
+    })
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
+        from .search import ensure_installed
+        post_migrate.connect(ensure_installed, sender=self)
@@ -0,0 +1,121 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+INDEX_FEED = 'index'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def post_feeds(post):
+    """Ленты, в которых показан пост, включая группу до переноса."""
+    feeds = {INDEX_FEED, author_feed(post.author_id)}
+    old_group_id = getattr(post, '_loaded_group_id', None)
+    for group_id in (post.group_id, old_group_id):
+        if group_id is not None:
+            feeds.add(group_feed(group_id))
+    return feeds
+
+
+def feed_count_key(feed):
+    return f'posts:count:{feed}'
+
+
+def cached_feed_count(feed, loader):
+    """Число постов ленты из кеша; при промахе считает его loader()."""
+    key = feed_count_key(feed)
+    count = cache.get(key)
+    if count is None:
+        count = loader()
+        cache.set(key, count, settings.POSTS_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def forget_feed_counts(feeds):
+    cache.delete_many([feed_count_key(feed) for feed in feeds])
+
+
+def _new_version():
+    # Версия от времени: после вытеснения ключа не вернемся к старой
+    return int(time.time() * 1000)
+
+
+def feed_version_key(feed):
+    return f'posts:version:{feed}'
+
+
+def feed_version(feed):
+    key = feed_version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_feed_versions(feeds):
+    """Делает устаревшими закешированные страницы лент feeds."""
+    for feed in feeds:
+        key = feed_version_key(feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def feed_page_key(feed, page_obj, request):
+    """Ключ отрисованной страницы ленты для тега {% cache %}."""
+    page = request.GET.get('cursor') if page_obj.cursor_mode else None
+    return f'{feed}:{feed_version(feed)}:{page or page_obj.number}'
+
+
+CARD_VARIANTS = ('index', 'group', 'profile')
+
+
+def author_names(author_id):
+    """Версия имени и username автора, показанных в карточках."""
+    return f'names:author:{author_id}'
+
+
+def group_names(group_id):
+    """Версия названия и slug группы, показанных в карточках."""
+    return f'names:group:{group_id}'
+
+
+def card_versions(posts):
+    """Версии авторов и групп карточек posts одним get_many."""
+    feeds = set()
+    for post in posts:
+        feeds.add(author_names(post.author_id))
+        if post.group_id is not None:
+            feeds.add(group_names(post.group_id))
+    keys = {feed_version_key(feed): feed for feed in feeds}
+    versions = {keys[key]: version
+                for key, version in cache.get_many(keys).items()}
+    for feed in feeds - set(versions):
+        versions[feed] = feed_version(feed)
+    return versions
+
+
+def post_card_key(post, variant, versions=None, updated_at=None):
+    """Ключ карточки: пост, время его правки и версии автора и группы."""
+    if versions is None:
+        versions = card_versions([post])
+    updated_at = updated_at or post.updated_at
+    group = (versions[group_names(post.group_id)]
+             if post.group_id is not None else 0)
+    return (f'posts:card:{variant}:{post.id}:{updated_at.timestamp()}:'
+            f'{versions[author_names(post.author_id)]}:{group}')
+
+
+def forget_post_cards(post, updated_at):
+    versions = card_versions([post])
+    cache.delete_many([post_card_key(post, variant, versions, updated_at)
+                       for variant in CARD_VARIANTS])
@@ -0,0 +1,47 @@
+"""Потоковая выгрузка постов в CSV и JSONL.
+
+Поля совпадают с форматом import_posts, так что выгрузку можно
+загрузить обратно.
+"""
+import csv
+import json
+
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(posts, chunk_size):
+    """Строки постов, читаемые из БД порциями по chunk_size."""
+    rows = posts.order_by('-pub_date', '-id').values_list(
+        'id', 'text', 'pub_date', 'author__username', 'group__slug')
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS, row), pub_date=row[2].isoformat())
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] or '' for field in FIELDS])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+WRITERS = {'csv': csv_lines, 'jsonl': jsonl_lines}
+
+
+def export_lines(posts, fmt, chunk_size):
+    return WRITERS[fmt](export_rows(posts, chunk_size))
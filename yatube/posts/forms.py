@@ -1,5 +1,7 @@
 from django import forms
+
 from .models import Post
+from .widgets import GroupAutocomplete
 
 
 class PostForm(forms.ModelForm):
@@ -11,3 +13,4 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост',
             'text': 'Tекст нового поста'
         }
+        widgets = {'group': GroupAutocomplete}
@@ -0,0 +1,122 @@
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+
+from .cache import bump_feed_versions, feed_version
+from .models import Group
+
+# Версия в общем кеше Django: по ней каждый процесс узнает,
+# что группы менялись где-то еще, и сбрасывает свои LRU
+GROUPS_VERSION = 'groups'
+
+
+class LRUCache:
+    """Словарь ограниченного размера, вытесняющий давно не читанное."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                self.data.move_to_end(key)
+            except KeyError:
+                return default
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class GroupCache:
+    """Группы по slug и pk.
+
+    Группы хранятся без posts_count: счетчик меняется UPDATE-запросом
+    без сигналов и в кеше быстро устарел бы. Наружу отдаются копии,
+    чтобы правки в представлении не попадали в кеш.
+    """
+
+    MISSING = object()
+
+    def __init__(self, maxsize):
+        self.by_slug = LRUCache(maxsize)
+        self.by_pk = LRUCache(maxsize)
+        self.version = None
+
+    def sync(self):
+        version = feed_version(GROUPS_VERSION)
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        self.by_slug.clear()
+        self.by_pk.clear()
+
+    def lookup(self, lru, **lookup):
+        self.sync()
+        (value,) = lookup.values()
+        group = lru.get(value, self.MISSING)
+        if group is self.MISSING:
+            group = Group.objects.defer('posts_count').filter(
+                **lookup).first()
+            lru.set(value, group)
+        return copy.copy(group)
+
+    def get_by_slug(self, slug):
+        return self.lookup(self.by_slug, slug=slug)
+
+    def get_by_pk(self, pk):
+        return self.lookup(self.by_pk, pk=pk)
+
+
+groups = GroupCache(settings.GROUP_CACHE_SIZE)
+
+
+def get_group_or_404(slug):
+    group = groups.get_by_slug(slug)
+    if group is None:
+        raise Http404(f'Группа {slug} не найдена')
+    return group
+
+
+def prefix_range(prefix):
+    """Полуинтервал строк, начинающихся с prefix, для поиска по индексу."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_groups(queryset, query):
+    """Группы queryset, название или slug которых начинаются с query."""
+    query = query.strip().lower()
+    if query:
+        start, stop = prefix_range(query)
+        queryset = queryset.filter(
+            Q(search_title__gte=start, search_title__lt=stop)
+            | Q(search_slug__gte=start, search_slug__lt=stop))
+    return queryset.order_by('search_title', 'id')
+
+
+def forget_groups():
+    """Сбрасывает кеши групп во всех процессах."""
+    bump_feed_versions([GROUPS_VERSION])
+    groups.clear()
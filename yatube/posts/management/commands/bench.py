@@ -0,0 +1,192 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+
+from core.timing import BENCH_CACHES, QueryTimer
+from posts import urls as posts_urls
+from posts.models import Group, Post, User
+
+# GET-параметры для маршрутов, которым без них нечего показать
+ROUTE_PARAMS = {
+    'search': {'q': 'bench'},
+    'api_groups': {'q': 'группа 1'},
+}
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет представления posts на синтетических данных '
+            'во временной базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кеш перед каждым запросом')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Отдавать гостям целые страницы из кеша')
+        parser.add_argument('--json', metavar='PATH',
+                            help='Записать результаты в JSON ("-" в stdout)')
+
+    @override_settings(CACHES=BENCH_CACHES)
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Ответы 405 и медленные запросы не пишем в stderr и журнал
+        logging.disable(logging.WARNING)
+        try:
+            cache.clear()
+            sample = self.build_dataset(options)
+            results = self.run_routes(sample, options)
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.report(results, options)
+
+    def build_dataset(self, options):
+        rnd = random.Random(options['seed'])
+        User.objects.bulk_create(
+            [User(username=f'bench{num}', first_name='Bench',
+                  last_name=str(num)) for num in range(options['users'])],
+            batch_size=500)
+        Group.objects.bulk_create(
+            [Group(title=f'Группа {num}', search_title=f'группа {num}',
+                   slug=f'bench-{num}', search_slug=f'bench-{num}',
+                   description='Группа для замеров')
+             for num in range(options['groups'])],
+            batch_size=500)
+        user_ids = list(User.objects.values_list('id', flat=True))
+        group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+        words = ['bench', 'post', 'yatube', 'django', 'лента', 'пост']
+        batch = []
+        for num in range(options['posts']):
+            batch.append(Post(
+                author_id=rnd.choice(user_ids),
+                group_id=rnd.choice(group_ids),
+                text=' '.join(rnd.choices(words, k=20)) + f' {num}',
+            ))
+            if len(batch) == 1000:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+        post = Post.objects.filter(group__isnull=False).first()
+        return {
+            'author': post.author,
+            'kwargs': {
+                'slug': post.group.slug,
+                'username': post.author.username,
+                'post_id': post.id,
+            },
+        }
+
+    def run_routes(self, sample, options):
+        guest = Client()
+        if not options['page_cache']:
+            # Гость с cookie проходит мимо кеша целых страниц до представления
+            guest.cookies['bench'] = '1'
+        member = Client()
+        member.force_login(sample['author'])
+        login_url = reverse(settings.LOGIN_URL)
+        results = []
+        for pattern in posts_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{posts_urls.app_name}:{pattern.name}'
+            unknown = set(pattern.pattern.converters) - set(sample['kwargs'])
+            if unknown:
+                self.stderr.write(f'{name}: пропущен, нет значений для '
+                                  f'{", ".join(sorted(unknown))}')
+                continue
+            kwargs = {key: sample['kwargs'][key]
+                      for key in pattern.pattern.converters}
+            url = reverse(name, kwargs=kwargs)
+            params = ROUTE_PARAMS.get(pattern.name, {})
+            client = guest
+            response = client.get(url, params)
+            if response.status_code == 302 and response.url.startswith(
+                    login_url):
+                client = member
+                response = client.get(url, params)
+            if response.status_code == 405:
+                self.stderr.write(f'{name}: пропущен, не принимает GET')
+                continue
+            results.append(self.measure(client, name, url, params, options))
+        return results
+
+    def measure(self, client, name, url, params, options):
+        timings, queries, sql_times, statuses = [], [], [], set()
+        for _ in range(options['iterations']):
+            if options['cold']:
+                cache.clear()
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                response = client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+            queries.append(timer.count)
+            sql_times.append(timer.seconds * 1000)
+        return {
+            'view': name,
+            'url': url,
+            'status': '/'.join(map(str, sorted(statuses))),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': sum(queries) / len(queries),
+            'sql_ms': sum(sql_times) / len(sql_times),
+        }
+
+    def cache_mode(self, options):
+        if options['cold']:
+            return 'холодный: очищается перед каждым запросом'
+        if options['page_cache']:
+            return 'теплый, гостям целые страницы из кеша'
+        return 'теплый, без кеша целых страниц для гостей'
+
+    def report(self, results, options):
+        header = (f'{"view":<22}{"status":>8}{"p50 ms":>10}{"p95 ms":>10}'
+                  f'{"p99 ms":>10}{"queries":>10}{"sql ms":>10}')
+        self.stdout.write(f'Кеш: {self.cache_mode(options)}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in results:
+            self.stdout.write(
+                f'{row["view"]:<22}{row["status"]:>8}{row["p50_ms"]:>10.2f}'
+                f'{row["p95_ms"]:>10.2f}{row["p99_ms"]:>10.2f}'
+                f'{row["queries"]:>10.1f}{row["sql_ms"]:>10.2f}')
+        if options['json']:
+            payload = json.dumps({
+                'dataset': {key: options[key]
+                            for key in ('users', 'groups', 'posts')},
+                'iterations': options['iterations'],
+                'cold': options['cold'],
+                'page_cache': options['page_cache'],
+                'cache': self.cache_mode(options),
+                'results': results,
+            }, indent=2)
+            if options['json'] == '-':
+                self.stdout.write(payload)
+            else:
+                with open(options['json'], 'w') as output:
+                    output.write(payload)
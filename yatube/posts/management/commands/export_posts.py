@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exports import WRITERS, export_lines
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты автора или группы в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--author', help='username автора')
+        source.add_argument('--group', help='slug группы')
+        parser.add_argument('--format', choices=WRITERS, default='jsonl')
+        parser.add_argument('--output', default='-',
+                            help='Файл или "-" для stdout')
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.POSTS_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, author, group, output, chunk_size, **options):
+        posts = Post.objects.all()
+        try:
+            if author:
+                posts = User.objects.get(username=author).posts.all()
+            elif group:
+                posts = Group.objects.get(slug=group).posts.all()
+        except (User.DoesNotExist, Group.DoesNotExist) as error:
+            raise CommandError(error)
+        lines = export_lines(posts, options['format'], chunk_size)
+        if output == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(lines)
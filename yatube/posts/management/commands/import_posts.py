@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group, Post, User
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Битая строка пропускается в save() как неверная запись
+            yield None
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def well_formed(record):
+    """Запись - объект, а ее текст, автор и группа - строки."""
+    return isinstance(record, dict) and all(
+        isinstance(record.get(field) or '', str)
+        for field in ('text', 'author', 'group'))
+
+
+class Lookup:
+    """Кеш значение -> id, дозаполняемый одним запросом на пачку."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def prefetch(self, values):
+        missing = {value for value in values
+                   if value and value not in self.ids}
+        if not missing:
+            return
+        found = dict(self.queryset.filter(**{f'{self.field}__in': missing})
+                     .values_list(self.field, 'id'))
+        for value in missing:
+            self.ids[value] = found.get(value)
+
+    def __getitem__(self, value):
+        return self.ids.get(value) if value else None
+
+
+@contextmanager
+def keep_dates():
+    """Сохраняет даты из выгрузки: отключает auto_now у полей Post."""
+    pub_date = Post._meta.get_field('pub_date')
+    updated_at = Post._meta.get_field('updated_at')
+    pub_date.auto_now_add = updated_at.auto_now = False
+    try:
+        yield
+    finally:
+        pub_date.auto_now_add = updated_at.auto_now = True
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает посты из JSONL или CSV '
+            '(поля text, author, group, pub_date)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdin')
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--progress-every', type=int, default=10000)
+
+    def handle(self, *args, path, batch_size, progress_every, **options):
+        fmt = options['format'] or ('csv' if path.endswith('.csv')
+                                    else 'jsonl')
+        self.authors = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.imported = self.skipped = 0
+        self.started = time.monotonic()
+        next_report = progress_every
+        with self.open(path) as stream, keep_dates():
+            batch = []
+            for record in READERS[fmt](stream):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    self.save(batch)
+                    batch = []
+                if self.imported + self.skipped >= next_report:
+                    self.report(self.stderr)
+                    next_report += progress_every
+            self.save(batch)
+        self.report(self.stdout)
+
+    @contextmanager
+    def open(self, path):
+        if path == '-':
+            yield io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8',
+                                   newline='')
+            return
+        try:
+            stream = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with stream:
+            yield stream
+
+    def save(self, records):
+        valid = [record for record in records if well_formed(record)]
+        self.skipped += len(records) - len(valid)
+        records = valid
+        if not records:
+            return
+        self.authors.prefetch(record.get('author') for record in records)
+        self.groups.prefetch(record.get('group') for record in records)
+        now = timezone.now()
+        posts = []
+        for record in records:
+            author_id = self.authors[record.get('author')]
+            group_slug = record.get('group')
+            group_id = self.groups[group_slug]
+            pub_date = self.pub_date(record, now)
+            if not author_id or not record.get('text') or not pub_date or (
+                    group_slug and not group_id):
+                self.skipped += 1
+                continue
+            posts.append(Post(author_id=author_id, group_id=group_id,
+                              text=record['text'], pub_date=pub_date,
+                              updated_at=pub_date))
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+        self.imported += len(posts)
+
+    def pub_date(self, record, now):
+        """Дата записи, now без даты и None для неверной даты."""
+        value = record.get('pub_date')
+        if not value:
+            return now
+        try:
+            # 2020-13-45T00:00 проходит по формату, но падает с ValueError
+            pub_date = parse_datetime(value)
+            if pub_date and timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        except (TypeError, ValueError):
+            return None
+        return pub_date
+
+    def report(self, stream):
+        elapsed = time.monotonic() - self.started
+        rate = self.imported / elapsed if elapsed else 0
+        stream.write(f'Загружено {self.imported}, пропущено {self.skipped}, '
+                     f'{rate:.0f} постов/с')
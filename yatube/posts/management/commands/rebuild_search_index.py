@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts import search
+from posts.cache import INDEX_FEED, bump_feed_versions
+
+
+class Command(BaseCommand):
+    help = 'Пересоздает полнотекстовый индекс постов и его триггеры'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, database, **options):
+        connection = connections[database]
+        if not search.is_supported(connection):
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        search.rebuild(connection)
+        # Закешированные страницы поиска строились по старому индексу
+        bump_feed_versions([INDEX_FEED])
+        self.stdout.write('Поисковый индекс перестроен')
@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncMonth
+
+from posts.cache import (author_feed, bump_feed_versions, forget_feed_counts,
+                         group_feed)
+from posts.models import (AuthorGroupStats, AuthorMonthStats, AuthorStats,
+                          Group, Post, User)
+from posts.receivers import month_of
+
+
+def batches(queryset, size):
+    """Отдает списки id из queryset порциями по size по возрастанию id."""
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_id).order_by('pk')
+                   .values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счетчики и статистику постов авторов и групп '
+            'и чинит расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        authors = sum(self.repair_authors(ids)
+                      for ids in batches(User.objects.all(), batch_size))
+        groups = sum(self.repair_groups(ids)
+                     for ids in batches(Group.objects.all(), batch_size))
+        self.stdout.write(
+            f'Исправлено счетчиков: авторов {authors}, групп {groups}')
+
+    def repair_authors(self, ids):
+        posts = Post.objects.filter(author_id__in=ids).order_by()
+        actual = {row['author']: row for row in posts.values(
+            'author').annotate(total=Count('id'), first=Min('pub_date'),
+                               last=Max('pub_date'))}
+        stored = {row[0]: row[1:] for row in AuthorStats.objects.filter(
+            author_id__in=ids).values_list(
+                'author_id', 'posts_count', 'first_post_at', 'last_post_at')}
+        by_group = {(row['author'], row['group']): row['total']
+                    for row in posts.filter(group__isnull=False).values(
+                        'author', 'group').annotate(total=Count('id'))}
+        by_month = {(row['author'], month_of(row['month'])): row['total']
+                    for row in posts.annotate(
+                        month=TruncMonth('pub_date')).values(
+                            'author', 'month').annotate(total=Count('id'))}
+        fixed = set()
+        with transaction.atomic():
+            for author_id in ids:
+                row = actual.get(author_id, {})
+                values = (row.get('total', 0), row.get('first'),
+                          row.get('last'))
+                if author_id not in stored and not values[0]:
+                    continue
+                if stored.get(author_id) != values:
+                    AuthorStats.objects.update_or_create(
+                        author_id=author_id, defaults=dict(zip(
+                            ('posts_count', 'first_post_at', 'last_post_at'),
+                            values)))
+                    fixed.add(author_id)
+            fixed |= self.repair_rows(
+                AuthorGroupStats.objects.filter(author_id__in=ids),
+                ('author_id', 'group_id'), by_group)
+            fixed |= self.repair_rows(
+                AuthorMonthStats.objects.filter(author_id__in=ids),
+                ('author_id', 'month'), by_month)
+        self.forget_feeds(map(author_feed, fixed))
+        return len(fixed)
+
+    def forget_feeds(self, feeds):
+        """Сбрасывает закешированные числа и страницы исправленных лент."""
+        feeds = list(feeds)
+        forget_feed_counts(feeds)
+        bump_feed_versions(feeds)
+
+    def repair_rows(self, queryset, fields, actual):
+        """Приводит счетчики queryset к actual {(значения fields): n}.
+
+        Возвращает id авторов, у которых нашлись расхождения.
+        """
+        stored = {row[:-1]: row[-1] for row in queryset.values_list(
+            *fields, 'posts_count')}
+        fixed = set()
+        for key in stored.keys() - actual.keys():
+            queryset.filter(**dict(zip(fields, key))).delete()
+            fixed.add(key[0])
+        for key, total in actual.items():
+            if stored.get(key) != total:
+                queryset.update_or_create(**dict(zip(fields, key)),
+                                          defaults={'posts_count': total})
+                fixed.add(key[0])
+        return fixed
+
+    def repair_groups(self, ids):
+        actual = dict(Post.objects.filter(group_id__in=ids).order_by()
+                      .values_list('group').annotate(Count('id')))
+        stored = dict(Group.objects.filter(pk__in=ids)
+                      .values_list('pk', 'posts_count'))
+        fixed = []
+        with transaction.atomic():
+            for group_id in ids:
+                total = actual.get(group_id, 0)
+                if stored.get(group_id) != total:
+                    Group.objects.filter(pk=group_id).update(
+                        posts_count=total)
+                    fixed.append(group_id)
+        self.forget_feeds(map(group_feed, fixed))
+        return len(fixed)
@@ -0,0 +1,85 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncMonth
+
+
+def fill_author_stats(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    AuthorGroupStats = apps.get_model('posts', 'AuthorGroupStats')
+    AuthorMonthStats = apps.get_model('posts', 'AuthorMonthStats')
+    posts = Post.objects.order_by()
+    by_author = posts.values('author').annotate(
+        first=models.Min('pub_date'), last=models.Max('pub_date'))
+    for row in by_author:
+        AuthorStats.objects.filter(author_id=row['author']).update(
+            first_post_at=row['first'], last_post_at=row['last'])
+    by_group = posts.filter(group__isnull=False).values(
+        'author', 'group').annotate(total=models.Count('id'))
+    AuthorGroupStats.objects.bulk_create(
+        [AuthorGroupStats(author_id=row['author'], group_id=row['group'],
+                          posts_count=row['total']) for row in by_group],
+        batch_size=500,
+    )
+    by_month = posts.annotate(month=TruncMonth('pub_date')).values(
+        'author', 'month').annotate(total=models.Count('id'))
+    AuthorMonthStats.objects.bulk_create(
+        [AuthorMonthStats(author_id=row['author'], month=row['month'].date(),
+                          posts_count=row['total']) for row in by_month],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='first_post_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Первый пост'),
+        ),
+        migrations.AddField(
+            model_name='authorstats',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.CreateModel(
+            name='AuthorMonthStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Посты автора за месяц',
+                'verbose_name_plural': 'Посты авторов по месяцам',
+                'ordering': ['-month'],
+                'unique_together': {('author', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthorGroupStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Посты автора в группе',
+                'verbose_name_plural': 'Посты авторов по группам',
+                'ordering': ['-posts_count', 'group'],
+                'unique_together': {('author', 'group')},
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
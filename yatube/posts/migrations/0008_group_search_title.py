@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+def fill_search_title(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    for group in Group.objects.only('title').iterator():
+        Group.objects.filter(pk=group.pk).update(
+            search_title=group.title.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_author_stats_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='search_title',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Название для поиска'),
+        ),
+        migrations.RunPython(fill_search_title, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['search_title', 'id'], name='group_search_title_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+def fill_search_slug(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    for group in Group.objects.only('slug').iterator():
+        Group.objects.filter(pk=group.pk).update(
+            search_slug=group.slug.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='search_slug',
+            field=models.CharField(default='', editable=False, max_length=50, verbose_name='Адрес для поиска'),
+        ),
+        migrations.RunPython(fill_search_slug, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['search_slug'], name='group_search_slug_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 
 from django.contrib.auth import get_user_model
 
+from .signals import post_bulk_create
+
 User = get_user_model()
 
 
@@ -10,10 +12,50 @@ class Group(models.Model):
     slug = models.SlugField(unique=True,
                             verbose_name='Адрес группы типа slug')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Число постов')
+    # Название в нижнем регистре для поиска по началу через индекс:
+    # LOWER и LIKE в SQLite не понимают кириллицу
+    search_title = models.CharField(
+        max_length=200, editable=False, default='',
+        verbose_name='Название для поиска')
+    # slug бывает в любом регистре, а индекс slug регистр различает
+    search_slug = models.CharField(
+        max_length=50, editable=False, default='',
+        verbose_name='Адрес для поиска')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['search_title', 'id'],
+                         name='group_search_title_idx'),
+            models.Index(fields=['search_slug'],
+                         name='group_search_slug_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.search_title = self.title.lower()
+        self.search_slug = self.slug.lower()
+        super().save(*args, **kwargs)
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для лент: автор и группа одним JOIN, только нужные поля."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated_at', 'author', 'group',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug',
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не шлет post_save, поэтому сообщаем о постах сами
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_create.send(sender=self.model, posts=objs)
+        return objs
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста',
@@ -21,6 +63,8 @@ class Post(models.Model):
                             )
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -37,8 +81,186 @@ class Post(models.Model):
         help_text='Группа, к которой будет относиться пост'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
+        # Индексы под ленты: фильтр по автору/группе с сортировкой по дате;
+        # id в конце индекса нужен курсорной пагинации
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем группу и время правки из БД, чтобы заметить перенос
+        # поста и сбросить карточку со старой версией
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        instance._loaded_updated_at = instance.__dict__.get('updated_at')
+        return instance
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число постов')
+    first_post_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Первый пост')
+    last_post_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Последний пост')
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число подписчиков')
+    # У популярных авторов посты не раскладываются по лентам
+    # подписчиков, а подмешиваются при чтении ленты. Флаг не снимается,
+    # чтобы посты, не попавшие в ленты, не потерялись.
+    pull_timeline = models.BooleanField(
+        default=False, verbose_name='Посты читаются при показе ленты')
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
+
+    @classmethod
+    def of(cls, author):
+        """Статистика автора; пустая, если он еще ничего не публиковал."""
+        try:
+            return author.stats
+        except cls.DoesNotExist:
+            return cls(author=author)
+
+    @classmethod
+    def posts_count_of(cls, author):
+        return cls.of(author).posts_count
+
+
+class AuthorGroupStats(models.Model):
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число постов')
+
+    class Meta:
+        ordering = ['-posts_count', 'group']
+        unique_together = ('author', 'group')
+        verbose_name = 'Посты автора в группе'
+        verbose_name_plural = 'Посты авторов по группам'
+
+    def __str__(self):
+        return f'{self.author_id}/{self.group_id}: {self.posts_count}'
+
+
+class AuthorMonthStats(models.Model):
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='month_stats',
+        verbose_name='Автор'
+    )
+    month = models.DateField(verbose_name='Месяц')
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число постов')
+
+    class Meta:
+        ordering = ['-month']
+        unique_together = ('author', 'month')
+        verbose_name = 'Посты автора за месяц'
+        verbose_name_plural = 'Посты авторов по месяцам'
+
+    def __str__(self):
+        return f'{self.author_id}/{self.month:%Y-%m}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='follow_unique'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='follow_not_self'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в готовой ленте подписок пользователя.
+
+    pub_date и author скопированы из поста: страница ленты читается
+    одним проходом по индексу (user, -pub_date, -post).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи лент подписок'
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
@@ -0,0 +1,200 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import INDEX_FEED, cached_feed_count
+from django.utils.dateparse import parse_datetime
+
+
+class FeedPage(Page):
+    """Страница ленты с ограниченным окном номеров страниц."""
+
+    cursor_mode = False
+    window = 2
+
+    @property
+    def page_window(self):
+        first = max(1, self.number - self.window)
+        last = min(self.paginator.num_pages, self.number + self.window)
+        return range(first, last + 1)
+
+
+class FeedPaginator(Paginator):
+    """Постраничный вывод ленты через LIMIT/OFFSET.
+
+    Если известно число постов (например, из счетчика), его можно
+    передать в count числом или функцией, и COUNT(*) выполняться не будет.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        if callable(self._known_count):
+            return self._known_count()
+        if self._known_count is not None:
+            return self._known_count
+        return super().count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class CachedCountPaginator(FeedPaginator):
+    """Хранит число постов ленты feed в кеше Django.
+
+    Кеш сбрасывают получатели сигналов Post в posts.receivers.
+    """
+
+    def __init__(self, object_list, per_page, feed=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        if self.feed is None:
+            return FeedPaginator.count.func(self)
+        return cached_feed_count(
+            self.feed, lambda: FeedPaginator.count.func(self))
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator админки: для всех постов берет число из кеша ленты.
+
+    Кешированное число может ненадолго отставать от таблицы, зато
+    не требует COUNT(*) по миллионам строк. С фильтрами считаем честно.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return super().count
+        return cached_feed_count(INDEX_FEED, lambda: super(
+            EstimatedCountPaginator, self).count)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, pub_date, pk):
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор в тройку (направление, pub_date, id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        raise InvalidCursor(cursor)
+    return direction, pub_date, pk
+
+
+def _position(item):
+    if isinstance(item, dict):
+        return item['pub_date'], item['id']
+    return item.pub_date, item.id
+
+
+class CursorPage(Page):
+    """Страница ленты, соседние страницы которой задаются курсорами."""
+
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Page (cursor)>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(NEXT, *_position(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(PREVIOUS, *_position(self.object_list[0]))
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Стоимость любой страницы одинакова: запрос начинается с позиции
+    курсора по индексу и читает не больше per_page + 1 строк.
+    Условие записано как диапазон по pub_date, уточненный по id,
+    чтобы SQLite шел по индексу без OR-объединения и сортировки.
+    key_fields задает поля даты и id, если строки - не сами посты.
+    """
+
+    key_fields = ('pub_date', 'id')
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def rows_query(self, cursor):
+        """Возвращает направление обхода и запрос строк от курсора."""
+        posts = self.object_list
+        date, key = self.key_fields
+        if not cursor:
+            return None, posts.order_by(f'-{date}', f'-{key}')
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == NEXT:
+            return direction, posts.filter(
+                Q(**{f'{date}__lt': pub_date}) | Q(**{f'{key}__lt': pk}),
+                **{f'{date}__lte': pub_date},
+            ).order_by(f'-{date}', f'-{key}')
+        return direction, posts.filter(
+            Q(**{f'{date}__gt': pub_date}) | Q(**{f'{key}__gt': pk}),
+            **{f'{date}__gte': pub_date},
+        ).order_by(date, key)
+
+    def rows(self, cursor):
+        """Направление и до per_page + 1 строк от курсора."""
+        direction, rows_query = self.rows_query(cursor)
+        return direction, list(rows_query[:self.per_page + 1])
+
+    def page(self, cursor):
+        direction, rows = self.rows(cursor)
+        if direction is not None and not rows:
+            # За курсором ничего нет: посты удалены или курсор подделан
+            return self.page(None)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more,
+                          has_previous=direction is not None)
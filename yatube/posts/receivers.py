@@ -0,0 +1,247 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, F, Max, Min, Q, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import (INDEX_FEED, author_feed, author_names, bump_feed_versions,
+                    forget_feed_counts, forget_post_cards, group_feed,
+                    group_names, post_feeds)
+from .groups import forget_groups
+from .models import (AuthorGroupStats, AuthorMonthStats, AuthorStats, Follow,
+                     Group, Post, User)
+from .signals import post_bulk_create
+from .timeline import enqueue_fan_out, follow_started, follow_stopped
+
+
+def month_of(moment):
+    """Первое число месяца публикации в текущем часовом поясе."""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def add_author_posts(counts, dates=None):
+    """Прибавляет к счетчикам авторов {author_id: n}.
+
+    dates {author_id: (первая, последняя)} раздвигает границы дат
+    публикаций автора. Транзакция начинается с записи, а не с чтения:
+    в SQLite чтение перед записью не дождется блокировки и упадет
+    с "database is locked".
+    """
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id)
+         for author_id, delta in counts.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    dates = dates or {}
+    for author_id, delta in counts.items():
+        changes = {'posts_count': F('posts_count') + delta}
+        if author_id in dates:
+            first, last = (Value(moment, output_field=DateTimeField())
+                           for moment in dates[author_id])
+            changes['first_post_at'] = Least(
+                Coalesce('first_post_at', first), first)
+            changes['last_post_at'] = Greatest(
+                Coalesce('last_post_at', last), last)
+        AuthorStats.objects.filter(author_id=author_id).update(**changes)
+
+
+def refresh_author_dates(author_id):
+    """Пересчитывает даты первого и последнего поста автора."""
+    dates = Post.objects.filter(author_id=author_id).aggregate(
+        first=Min('pub_date'), last=Max('pub_date'))
+    AuthorStats.objects.filter(author_id=author_id).update(
+        first_post_at=dates['first'], last_post_at=dates['last'])
+
+
+def add_group_posts(counts):
+    """Прибавляет к счетчикам групп {group_id: n}."""
+    for group_id, delta in counts.items():
+        if group_id is not None and delta:
+            Group.objects.filter(pk=group_id).update(
+                posts_count=F('posts_count') + delta)
+
+
+def add_rows(model, counts, fields):
+    """Прибавляет к счетчикам строк model {(значения fields): n}.
+
+    Недостающие строки создаются, обнулившиеся удаляются.
+    """
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, key)))
+         for key, delta in counts.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    for key, delta in counts.items():
+        if not delta:
+            continue
+        rows = model.objects.filter(**dict(zip(fields, key)))
+        rows.update(posts_count=F('posts_count') + delta)
+        if delta < 0:
+            rows.filter(posts_count=0).delete()
+
+
+def add_author_groups(counts):
+    """Прибавляет к счетчикам {(author_id, group_id): n}."""
+    add_rows(AuthorGroupStats, {
+        key: delta for key, delta in counts.items() if key[1] is not None
+    }, ('author_id', 'group_id'))
+
+
+def add_posts(posts, sign=1):
+    """Учитывает в счетчиках появление (sign=1) или удаление (-1) постов."""
+    authors, groups, author_groups, months = (
+        Counter(), Counter(), Counter(), Counter())
+    dates = {}
+    for post in posts:
+        authors[post.author_id] += sign
+        groups[post.group_id] += sign
+        author_groups[post.author_id, post.group_id] += sign
+        months[post.author_id, month_of(post.pub_date)] += sign
+        first, last = dates.get(post.author_id, (post.pub_date,) * 2)
+        dates[post.author_id] = (min(first, post.pub_date),
+                                 max(last, post.pub_date))
+    add_author_posts(authors, dates if sign > 0 else None)
+    add_group_posts(groups)
+    add_author_groups(author_groups)
+    add_rows(AuthorMonthStats, months, ('author_id', 'month'))
+    if sign < 0:
+        # Границы дат сдвигаются, только если удалили крайний пост
+        for author_id, (first, last) in dates.items():
+            if AuthorStats.objects.filter(
+                    Q(first_post_at=first) | Q(last_post_at=last),
+                    author_id=author_id).exists():
+                refresh_author_dates(author_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    with transaction.atomic():
+        if created:
+            add_posts([instance])
+            enqueue_fan_out([instance])
+        elif old_group_id != instance.group_id:
+            add_group_posts({old_group_id: -1, instance.group_id: 1})
+            add_author_groups({(instance.author_id, old_group_id): -1,
+                               (instance.author_id, instance.group_id): 1})
+    feeds = post_feeds(instance)
+    if created or old_group_id != instance.group_id:
+        forget_feed_counts(feeds)
+    bump_feed_versions(feeds)
+    old_updated_at = getattr(instance, '_loaded_updated_at', None)
+    if old_updated_at and old_updated_at != instance.updated_at:
+        forget_post_cards(instance, old_updated_at)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_updated_at = instance.updated_at
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        add_posts([instance], sign=-1)
+    feeds = post_feeds(instance)
+    forget_feed_counts(feeds)
+    bump_feed_versions(feeds)
+    forget_post_cards(instance, instance.updated_at)
+
+
+@receiver(post_bulk_create, sender=Post)
+def posts_bulk_created(sender, posts, **kwargs):
+    with transaction.atomic():
+        add_posts(posts)
+        enqueue_fan_out(posts)
+    feeds = set().union(*map(post_feeds, posts))
+    forget_feed_counts(feeds)
+    bump_feed_versions(feeds)
+
+
+# Поля, которые видны в карточках постов
+GROUP_CARD_FIELDS = {'title', 'slug'}
+USER_CARD_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def changes_cards(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+def group_card_feeds(group_id):
+    """Ленты, в карточках которых видна группа: главная и ее авторы."""
+    return [group_names(group_id), INDEX_FEED, *map(
+        author_feed, AuthorGroupStats.objects.filter(
+            group_id=group_id).values_list('author_id', flat=True))]
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, update_fields=None, **kwargs):
+    # id удаленной группы может достаться новой, старый кеш ей не подходит
+    if created:
+        forget_feed_counts([group_feed(instance.pk)])
+    # Название и описание группы тоже входят в страницу ленты
+    feeds = [group_feed(instance.pk)]
+    if not created and changes_cards(update_fields, GROUP_CARD_FIELDS):
+        feeds += group_card_feeds(instance.pk)
+    bump_feed_versions(feeds)
+    forget_groups()
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты теряют группу через UPDATE без сигналов Post, а строки
+    # AuthorGroupStats удалит каскад: авторов запоминаем заранее
+    instance._card_feeds = group_card_feeds(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump_feed_versions(getattr(instance, '_card_feeds', []))
+    forget_groups()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        forget_feed_counts([author_feed(instance.pk)])
+    feeds = [author_feed(instance.pk)]
+    # Вход обновляет только last_login, карточки от этого не меняются
+    if not created and changes_cards(update_fields, USER_CARD_FIELDS):
+        # Имя автора видно и на главной, и в лентах его групп
+        feeds += [author_names(instance.pk), INDEX_FEED]
+        feeds += map(group_feed, AuthorGroupStats.objects.filter(
+            author_id=instance.pk).values_list('group_id', flat=True))
+    bump_feed_versions(feeds)
+
+
+def add_followers(author_id, delta):
+    """Меняет число подписчиков автора; популярных переводит на pull."""
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id)] if delta > 0 else [],
+        ignore_conflicts=True)
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    stats.update(followers_count=F('followers_count') + delta)
+    stats.filter(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT).update(
+        pull_timeline=True)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    with transaction.atomic():
+        add_followers(instance.author_id, 1)
+        follow_started(instance.user_id, instance.author_id)
+    # Кнопка подписки входит в страницу профиля
+    bump_feed_versions([author_feed(instance.author_id)])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        add_followers(instance.author_id, -1)
+        follow_stopped(instance.user_id, instance.author_id)
+    bump_feed_versions([author_feed(instance.author_id)])
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Отправляется PostQuerySet.bulk_create со списком созданных постов
+post_bulk_create = Signal()
@@ -0,0 +1,26 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import card_versions, post_card_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, variant):
+    """Карточки постов ленты: из кеша одним get_many, остальные рисуем."""
+    posts = list(posts)
+    versions = card_versions(posts)
+    keys = {post_card_key(post, variant, versions): post for post in posts}
+    cards = cache.get_many(keys)
+    missing = {
+        key: render_to_string('includes/post_card.html',
+                              {'post': post, 'variant': variant})
+        for key, post in keys.items() if key not in cards
+    }
+    cache.set_many(missing, settings.POSTS_CARD_CACHE_TIMEOUT)
+    cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,101 @@
+import datetime as dt
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, User
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@test.ru', password='pass')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {num}', slug=f'group-{num}',
+                                 description='Описание')
+            for num in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_posts(self, number):
+        for num in range(number):
+            author = User.objects.create_user(
+                username=f'author-{Post.objects.count()}')
+            Post.objects.create(author=author, text='Текст',
+                                group=self.groups[num % 3])
+
+    def count_queries(self):
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк"""
+        self.add_posts(2)
+        few_rows = self.count_queries()
+        self.add_posts(10)
+        self.assertEqual(self.count_queries(), few_rows)
+
+    def test_changelist_skips_full_count(self):
+        """Список без фильтров не выполняет COUNT(*) по постам"""
+        self.add_posts(2)
+        self.count_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertFalse([
+            query for query in queries
+            if 'COUNT(*)' in query['sql'] and 'posts_post' in query['sql']
+        ])
+
+    def test_changelist_renders_only_selected_groups(self):
+        """Строки списка постов не содержат полный список групп"""
+        self.add_posts(1)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, self.groups[0].title)
+        self.assertNotContains(response, self.groups[2].title)
+
+    def test_group_autocomplete_searches_by_prefix(self):
+        """Автодополнение групп в админке ищет по началу названия"""
+        response = self.client.get(reverse('admin:posts_group_autocomplete'),
+                                   {'term': 'группа 1'})
+        self.assertEqual([row['text'] for row in response.json()['results']],
+                         [self.groups[1].title])
+
+    def test_pub_date_filter_skips_table_aggregates(self):
+        """Фильтр по годам и месяцам не считает агрегаты по таблице"""
+        self.add_posts(1)
+        for moment in (dt.datetime(2021, 3, 5), dt.datetime(2023, 1, 10)):
+            Post.objects.filter(pk=Post.objects.create(
+                author=self.admin, text='Старый пост').pk).update(
+                pub_date=timezone.make_aware(moment))
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([query for query in queries if any(
+            name in query['sql']
+            for name in ('MIN(', 'MAX(', 'DISTINCT', 'date_trunc'))])
+        self.assertContains(response, '?published=2022')
+        response = self.client.get(url, {'published': '2023'})
+        self.assertContains(response, '?published=2023-01')
+        self.assertNotContains(response, '?published=2022-')
+        response = self.client.get(url, {'published': '2021-03'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        for value in ('2021-13', '9999-12', '9999'):
+            with self.subTest(published=value):
+                response = self.client.get(url, {'published': value})
+                self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, {'published': '2022-12'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        response = self.client.get(url, {'published': '2021'})
+        self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,136 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..groups import search_groups
+from ..models import Group, Post, User
+from .test_query_plans import explain
+
+TEST_POSTS_NUM = 13
+
+
+class PostsApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Тестовый пост {post_num}',
+                 group=cls.group)
+            for post_num in range(TEST_POSTS_NUM)
+        ])
+        cls.post = Post.objects.latest('pub_date', 'id')
+
+    def test_feeds_match_html_pages(self):
+        """JSON-ленты отдают те же посты, что и HTML-страницы"""
+        pages = {
+            'posts:index': {},
+            'posts:group_list': {'slug': self.group.slug},
+            'posts:profile': {'username': self.user.username},
+        }
+        for name, kwargs in pages.items():
+            with self.subTest(name=name):
+                html = self.client.get(reverse(name, kwargs=kwargs))
+                api = self.client.get(
+                    reverse(name.replace(':', ':api_'), kwargs=kwargs))
+                self.assertEqual(
+                    [post['id'] for post in api.json()['results']],
+                    [post.id for post in html.context['page_obj']])
+
+    def test_feed_is_paginated_by_cursor(self):
+        """Курсор next ведет на следующую страницу ленты"""
+        data = self.client.get(reverse('posts:api_index')).json()
+        self.assertEqual(len(data['results']), settings.POSTS_SHOWN)
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']),
+                         TEST_POSTS_NUM - settings.POSTS_SHOWN)
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+    def test_profile_and_post_detail(self):
+        """Профиль и пост отдают автора, группу и число постов"""
+        profile = self.client.get(reverse(
+            'posts:api_profile', args=(self.user.username,))).json()
+        self.assertEqual(profile['author'], {
+            'username': 'auth', 'name': 'Лев Толстой',
+            'posts_count': TEST_POSTS_NUM})
+        post = self.client.get(reverse(
+            'posts:api_post_detail', args=(self.post.id,))).json()
+        self.assertEqual(post['text'], self.post.text)
+        self.assertEqual(post['group'], {'slug': self.group.slug,
+                                         'title': self.group.title})
+        self.assertEqual(post['author']['posts_count'], TEST_POSTS_NUM)
+
+    def test_feed_runs_single_query(self):
+        """Главная JSON-лента строится одним запросом"""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:api_index'))
+
+
+@override_settings(GROUP_AUTOCOMPLETE_SHOWN=2)
+class GroupsApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for title, slug in (('Кошки', 'cats'), ('Котики', 'kittens'),
+                            ('Коты и кошки', 'all-cats'),
+                            ('Собаки', 'dogs')):
+            Group.objects.create(title=title, slug=slug,
+                                 description='Описание')
+
+    def search(self, query, page=1):
+        response = self.client.get(reverse('posts:api_groups'),
+                                   {'q': query, 'page': page})
+        data = response.json()
+        return [row['text'] for row in data['results']], data['pagination']
+
+    def test_title_prefix_is_case_insensitive(self):
+        """Поиск по началу названия не зависит от регистра"""
+        self.assertEqual(self.search('ко'),
+                         (['Котики', 'Коты и кошки'], {'more': True}))
+        self.assertEqual(self.search('КО', page=2),
+                         (['Кошки'], {'more': False}))
+
+    @override_settings(GROUP_AUTOCOMPLETE_MAX_PAGE=1)
+    def test_page_past_the_limit_is_empty(self):
+        """Слишком далекая страница пуста, а не падает на OFFSET"""
+        self.assertEqual(self.search('ко'),
+                         (['Котики', 'Коты и кошки'], {'more': False}))
+        for page in (2, 10 ** 30):
+            with self.subTest(page=page):
+                self.assertEqual(self.search('ко', page=page),
+                                 ([], {'more': False}))
+
+    def test_slug_prefix(self):
+        """Группу можно найти по началу slug"""
+        self.assertEqual(self.search('DOG'), (['Собаки'], {'more': False}))
+
+    def test_mixed_case_slug_prefix(self):
+        """slug в разном регистре находится без учета регистра"""
+        Group.objects.create(title='Птицы', slug='BirdWatchers',
+                             description='Описание')
+        for query in ('bird', 'BIRDW', 'BirdWatchers'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query),
+                                 (['Птицы'], {'more': False}))
+
+    @skipUnless(connection.vendor == 'sqlite',
+                'EXPLAIN QUERY PLAN есть только в SQLite')
+    def test_search_uses_indexes(self):
+        """Поиск групп идет по индексам без полного скана"""
+        plan = explain(search_groups(Group.objects.all(), 'ко'))
+        for step in plan:
+            if step.startswith('SCAN'):
+                self.assertIn('USING', step, plan)
+        for index in ('group_search_title_idx', 'group_search_slug_idx'):
+            self.assertTrue([step for step in plan if index in step], plan)
@@ -0,0 +1,129 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Group, Post, User
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def import_file(self, content, suffix):
+        output = StringIO()
+        with tempfile.NamedTemporaryFile(
+                'w', suffix=suffix, encoding='utf-8') as dump:
+            dump.write(content)
+            dump.flush()
+            call_command('import_posts', dump.name, batch_size=2,
+                         stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def test_import_jsonl(self):
+        """Посты из JSONL загружаются с датой, автором и группой"""
+        records = [
+            {'text': 'Пост 1', 'author': 'auth', 'group': 'test-slug',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Пост 2', 'author': 'auth'},
+            {'text': 'Пост 3', 'author': 'auth', 'group': 'test-slug'},
+            {'text': 'Чужой пост', 'author': 'nobody'},
+        ]
+        self.import_file(
+            '\n'.join(json.dumps(record) for record in records), '.jsonl')
+        self.assertEqual(Post.objects.count(), 3)
+        post = Post.objects.get(text='Пост 1')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 3)
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).posts_count, 2)
+
+    def test_bad_records_are_skipped(self):
+        """Неверные даты и строки не-объекты пропускаются по одной"""
+        lines = [
+            json.dumps({'text': 'Пост 1', 'author': 'auth',
+                        'pub_date': '2020-13-45T00:00'}),
+            '[1, 2]',
+            json.dumps({'text': 'Пост 2', 'author': 'auth'}),
+            '{"text": ',
+            json.dumps({'text': 'Пост 3', 'author': 'auth',
+                        'pub_date': 'не дата'}),
+            json.dumps({'text': 'Пост 4', 'author': ['auth']}),
+            json.dumps({'text': 'Пост 5', 'author': 'auth',
+                        'group': {'slug': 'test-slug'}}),
+            json.dumps({'text': 6, 'author': 'auth'}),
+        ]
+        output = self.import_file('\n'.join(lines), '.jsonl')
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Пост 2'])
+        self.assertIn('Загружено 1, пропущено 7', output)
+
+    def test_import_csv(self):
+        """Посты загружаются из CSV"""
+        self.import_file(
+            'text,author,group,pub_date\n'
+            'Пост из CSV,auth,test-slug,\n'
+            'Пост без группы,auth,,\n', '.csv')
+        self.assertEqual(
+            set(Post.objects.values_list('text', flat=True)),
+            {'Пост из CSV', 'Пост без группы'})
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Пост в группе',
+                            group=cls.group)
+        Post.objects.create(author=cls.user, text='Пост без группы')
+
+    def test_profile_export_streams_jsonl(self):
+        """Выгрузка автора отдается потоком JSONL"""
+        response = self.client.get(
+            reverse('posts:profile_export', args=(self.user.username,)),
+            {'format': 'jsonl'})
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['text'] for row in rows],
+                         ['Пост без группы', 'Пост в группе'])
+        self.assertEqual(rows[1]['group'], self.group.slug)
+
+    def test_group_export_streams_csv(self):
+        """Выгрузка группы отдается потоком CSV"""
+        response = self.client.get(
+            reverse('posts:group_export', args=(self.group.slug,)))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,text,pub_date,author,group')
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Пост в группе', lines[1])
+
+    def test_export_command_round_trips_with_import(self):
+        """Выгрузка export_posts загружается обратно через import_posts"""
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as dump:
+            call_command('export_posts', author=self.user.username,
+                         output=dump.name)
+            Post.objects.all().delete()
+            call_command('import_posts', dump.name,
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            set(Post.objects.values_list('text', 'group__slug')),
+            {('Пост в группе', self.group.slug), ('Пост без группы', None)})
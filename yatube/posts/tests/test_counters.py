@@ -0,0 +1,193 @@
+import datetime as dt
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (AuthorGroupStats, AuthorMonthStats, AuthorStats, Group,
+                      Post, User)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание 2',
+        )
+
+    def assertCounters(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_post_changes(self):
+        """Счетчики меняются при создании, переносе и удалении поста"""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый текст', group=self.group)
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_bulk_create_updates_counters(self):
+        """bulk_create тоже обновляет счетчики"""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Тестовый текст', group=self.group)
+            for _ in range(3)
+        ])
+        self.assertCounters(3, 3, 0)
+
+    def test_repair_command_fixes_drift(self):
+        """Команда repair_post_counters чинит разошедшиеся счетчики"""
+        Post.objects.create(
+            author=self.user, text='Тестовый текст', group=self.group)
+        AuthorStats.objects.filter(author=self.user).update(posts_count=7)
+        Group.objects.filter(pk=self.other_group.pk).update(posts_count=5)
+        call_command('repair_post_counters', batch_size=1, stdout=StringIO())
+        self.assertCounters(1, 1, 0)
+
+    def test_repair_command_resets_cached_counts(self):
+        """После починки профиль и группа показывают верное число постов"""
+        Post.objects.create(
+            author=self.user, text='Тестовый текст', group=self.group)
+        AuthorStats.objects.filter(author=self.user).update(posts_count=7)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=5)
+        cache.clear()
+        client = Client()
+        client.force_login(self.user)
+        urls = [reverse('posts:profile', kwargs={'username': 'auth'}),
+                reverse('posts:group_list', kwargs={'slug': 'test-slug'})]
+        for url in urls:
+            self.assertEqual(client.get(url).context[
+                'page_obj'].paginator.count, 7 if 'profile' in url else 5)
+        call_command('repair_post_counters', stdout=StringIO())
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).context[
+                    'page_obj'].paginator.count, 1)
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый текст')
+
+    def setUp(self):
+        cache.clear()
+        # Гостю отдается закешированный ответ целиком, без контекста
+        self.client.force_login(self.user)
+
+    def test_index_count_is_cached(self):
+        """Число постов главной ленты берется из кеша"""
+        self.client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse(
+            [query for query in queries if 'COUNT' in query['sql']])
+
+    def test_post_writes_reset_cached_count(self):
+        """Создание и удаление поста сбрасывают кешированное число"""
+        self.client.get(reverse('posts:index'))
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        post.delete()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+
+class AuthorStatsDetailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание 2',
+        )
+        cls.january = dt.datetime(2023, 1, 10, tzinfo=timezone.utc)
+        cls.march = dt.datetime(2023, 3, 5, tzinfo=timezone.utc)
+
+    def create_post(self, moment, group=None):
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            return Post.objects.create(
+                author=self.user, text='Тестовый текст', group=group)
+
+    def assertStats(self, first, last, groups, months):
+        stats = AuthorStats.objects.get(author=self.user)
+        self.assertEqual((stats.first_post_at, stats.last_post_at),
+                         (first, last))
+        self.assertEqual(dict(AuthorGroupStats.objects.filter(
+            author=self.user).values_list('group', 'posts_count')), groups)
+        self.assertEqual(dict(AuthorMonthStats.objects.filter(
+            author=self.user).values_list('month', 'posts_count')), months)
+
+    def test_stats_follow_post_changes(self):
+        """Даты, группы и месяцы автора меняются вместе с постами"""
+        first = self.create_post(self.january, self.group)
+        self.create_post(self.march, self.other_group)
+        last = self.create_post(self.march + dt.timedelta(days=1))
+        self.assertStats(self.january, self.march + dt.timedelta(days=1),
+                         {self.group.pk: 1, self.other_group.pk: 1},
+                         {self.january.date().replace(day=1): 1,
+                          self.march.date().replace(day=1): 2})
+        first = Post.objects.get(pk=first.pk)
+        first.group = self.other_group
+        first.save()
+        last.delete()
+        first.delete()
+        self.assertStats(self.march, self.march, {self.other_group.pk: 1},
+                         {self.march.date().replace(day=1): 1})
+
+    def test_repair_command_fixes_stats(self):
+        """repair_post_counters восстанавливает даты, группы и месяцы"""
+        self.create_post(self.january, self.group)
+        AuthorStats.objects.filter(author=self.user).update(
+            first_post_at=None)
+        AuthorGroupStats.objects.all().delete()
+        AuthorMonthStats.objects.update(posts_count=9)
+        call_command('repair_post_counters', stdout=StringIO())
+        self.assertStats(self.january, self.january, {self.group.pk: 1},
+                         {self.january.date().replace(day=1): 1})
+
+    def test_profile_shows_stats_without_aggregates(self):
+        """Профиль выводит статистику без агрегатных запросов"""
+        self.create_post(self.january, self.group)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': 'auth'}))
+        self.assertContains(response, self.group.title)
+        self.assertContains(response, 'Январь 2023')
+        self.assertFalse([query for query in queries if any(
+            name in query['sql'] for name in ('COUNT(', 'MIN(', 'MAX('))])
@@ -0,0 +1,179 @@
+import datetime as dt
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import run_pending
+from core.models import Job
+
+from ..management.commands.import_posts import keep_dates
+from ..models import AuthorStats, Follow, Post, TimelineEntry, User
+from ..timeline import TimelinePaginator
+from .test_query_plans import explain
+
+
+@override_settings(JOBS_EAGER=True)
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, client, author):
+        return client.post(reverse('posts:profile_follow',
+                                   kwargs={'username': author.username}))
+
+    def timeline(self, user):
+        client = Client()
+        client.force_login(user)
+        response = client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют ленту и число подписчиков"""
+        Post.objects.create(author=self.author, text='Старый пост')
+        self.follow(self.reader_client, self.author)
+        self.assertEqual(self.timeline(self.reader), ['Старый пост'])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 1)
+        self.reader_client.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.timeline(self.reader), [])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 0)
+
+    def test_cannot_follow_self(self):
+        """На себя подписаться нельзя"""
+        self.follow(self.reader_client, self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_reaches_followers_only(self):
+        """Новый пост попадает только в ленты подписчиков"""
+        self.follow(self.reader_client, self.author)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.timeline(self.reader), ['Новый пост'])
+        self.assertEqual(self.timeline(self.stranger), [])
+
+    @override_settings(TIMELINE_FANOUT_BATCH=2)
+    def test_fan_out_in_batches(self):
+        """Пост раскладывается всем подписчикам пачками"""
+        followers = [User.objects.create_user(username=f'follower{num}')
+                     for num in range(5)]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=post).count(), len(followers))
+
+    @override_settings(JOBS_EAGER=False)
+    def test_fan_out_runs_in_job(self):
+        """Запись поста только ставит раскладку в очередь"""
+        self.follow(self.reader_client, self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=f'Пост {num}') for num in range(2)])
+        self.assertEqual(Job.objects.filter(name='posts.fan_out').count(), 2)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(run_pending(), 2)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(len(self.timeline(self.reader)), 3)
+        # Пост удалили раньше, чем воркер дошел до задачи
+        gone = Post.objects.create(author=self.author, text='Удаленный пост')
+        gone.delete()
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=post).count(), 1)
+
+    def test_bulk_created_posts_reach_followers(self):
+        """Посты из bulk_create тоже попадают в ленты"""
+        self.follow(self.reader_client, self.author)
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=f'Пост {num}') for num in range(3)])
+        self.assertEqual(len(self.timeline(self.reader)), 3)
+
+    @override_settings(TIMELINE_BACKFILL=0)
+    def test_bulk_fan_out_skips_older_posts_in_between(self):
+        """Из bulk_create раскладываются только вставленные посты"""
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        self.follow(self.reader_client, self.author)
+        dates = [old.pub_date - dt.timedelta(days=1),
+                 old.pub_date + dt.timedelta(days=1)]
+        with keep_dates():
+            Post.objects.bulk_create(
+                [Post(author=self.author, text=f'Пост {num}', pub_date=date,
+                      updated_at=date) for num, date in enumerate(dates)])
+        self.assertEqual(self.timeline(self.reader), ['Пост 1', 'Пост 0'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты популярного автора подмешиваются при чтении ленты"""
+        Post.objects.create(author=self.author, text='Пост до популярности')
+        self.follow(self.reader_client, self.author)
+        Follow.objects.create(user=self.stranger, author=self.author)
+        self.assertTrue(
+            AuthorStats.objects.get(author=self.author).pull_timeline)
+        Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__text='Пост звезды').exists())
+        # Записи, разложенные до популярности, не дублируют подмешанные
+        for user in (self.reader, self.stranger):
+            self.assertEqual(self.timeline(user),
+                             ['Пост звезды', 'Пост до популярности'])
+
+    def test_cursor_pages_cover_timeline(self):
+        """Страницы ленты по курсору проходят все посты по порядку"""
+        self.follow(self.reader_client, self.author)
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=f'Пост {num}')
+             for num in range(13)])
+        paginator = TimelinePaginator(self.reader, 10)
+        first = paginator.get_page(None)
+        second = paginator.get_page(first.next_cursor)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual((len(first), len(second)), (10, 3))
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(back), list(first))
+        self.assertEqual(
+            {post.pk for post in list(first) + list(second)},
+            set(Post.objects.values_list('pk', flat=True)))
+
+    def test_cursor_after_deleted_posts_shows_first_page(self):
+        """Курсор на удаленные новые посты открывает первую страницу"""
+        self.follow(self.reader_client, self.author)
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=f'Пост {num}')
+             for num in range(13)])
+        paginator = TimelinePaginator(self.reader, 10)
+        second = paginator.get_page(paginator.get_page(None).next_cursor)
+        cursor = second.previous_cursor
+        Post.objects.exclude(pk__in=[post.pk for post in second]).delete()
+        page = paginator.get_page(cursor)
+        self.assertEqual(list(page), list(second))
+        self.assertFalse(page.has_previous())
+        self.assertIsNone(page.previous_cursor)
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), {'cursor': cursor})
+        self.assertEqual(list(response.context['page_obj']), list(second))
+
+    @skipUnless(connection.vendor == 'sqlite',
+                'EXPLAIN QUERY PLAN есть только в SQLite')
+    def test_timeline_page_is_index_range_scan(self):
+        """Страница ленты читается по индексу без сортировки"""
+        paginator = TimelinePaginator(self.reader, 10)
+        for cursor in (None, paginator.get_page(None).next_cursor):
+            plan = explain(paginator.rows_query(cursor)[1][:11])
+            with self.subTest(cursor=cursor):
+                self.assertTrue([step for step in plan
+                                 if 'timeline_user_pub_date_idx' in step],
+                                plan)
+                self.assertFalse([step for step in plan
+                                  if 'TEMP B-TREE' in step], plan)
@@ -0,0 +1,81 @@
+from django import forms
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..forms import PostForm
+from ..groups import LRUCache, groups
+from ..models import Group, User
+
+
+class LRUCacheTest(TestCase):
+    def test_least_recently_used_is_evicted(self):
+        """При переполнении вытесняется давно не читанный ключ"""
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')),
+                         (1, None, 3))
+        self.assertEqual(len(lru), 2)
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@test.ru', password='pass')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups_hit_database_once(self):
+        """Повторный поиск группы по slug и pk не обращается к БД"""
+        groups.get_by_slug('test-slug')
+        groups.get_by_pk(self.group.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(groups.get_by_slug('test-slug'), self.group)
+            self.assertEqual(groups.get_by_pk(self.group.pk), self.group)
+            self.assertIsNone(groups.get_by_slug('missing'))
+        self.assertEqual(len(queries), 1)
+
+    def test_save_and_delete_invalidate(self):
+        """Сохранение и удаление группы сбрасывают кеш"""
+        groups.get_by_slug('test-slug')
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(groups.get_by_slug('test-slug').title,
+                         'Новое название')
+        group.delete()
+        self.assertIsNone(groups.get_by_slug('test-slug'))
+
+    def test_admin_change_invalidates(self):
+        """Правка группы в админке видна на странице группы"""
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.client.get(url)
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse('admin:posts_group_change', args=(self.group.pk,)),
+            {'title': 'Из админки', 'slug': 'test-slug',
+             'description': 'Тестовое описание'})
+        self.assertContains(self.client.get(url), 'Из админки')
+
+    def test_post_form_group_comes_from_cache(self):
+        """Форма поста берет выбранную группу из кеша без запроса к БД"""
+        form = PostForm(initial={'group': self.group.pk})
+        str(form['group'])
+        self.assertIs(type(form.fields['group']), forms.ModelChoiceField)
+        with CaptureQueriesContext(connection) as queries:
+            html = str(PostForm(initial={'group': self.group.pk})['group'])
+        self.assertIn('Тестовая группа', html)
+        self.assertEqual(len(queries), 0)
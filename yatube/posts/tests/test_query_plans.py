@@ -0,0 +1,66 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Group, Post, User
+from ..paginators import CursorPaginator, NEXT, PREVIOUS, encode_cursor
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@skipUnless(connection.vendor == 'sqlite',
+            'EXPLAIN QUERY PLAN есть только в SQLite')
+class FeedQueryPlanTest(TestCase):
+    """Ленты читаются по индексу, без полного скана и сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group)
+
+    def assertIndexedPlan(self, queryset):
+        plan = explain(queryset)
+        for step in plan:
+            self.assertNotIn('TEMP B-TREE', step, plan)
+            if step.startswith('SCAN'):
+                self.assertIn('USING', step, plan)
+
+    def feeds(self):
+        return {
+            'index': Post.objects.feed(),
+            'group_list': self.group.posts.feed(),
+            'profile': self.user.posts.feed(),
+        }
+
+    def test_feed_querysets_use_indexes(self):
+        """Запросы страниц index, group_list и profile используют индексы"""
+        shown = settings.POSTS_SHOWN
+        for name, posts in self.feeds().items():
+            with self.subTest(feed=name):
+                self.assertIndexedPlan(posts[:shown])
+                self.assertIndexedPlan(posts[shown * 100:shown * 101])
+
+    def test_cursor_querysets_use_indexes(self):
+        """Курсорные страницы лент используют индексы"""
+        for name, posts in self.feeds().items():
+            paginator = CursorPaginator(posts, settings.POSTS_SHOWN)
+            for direction in (NEXT, PREVIOUS):
+                cursor = encode_cursor(
+                    direction, self.post.pub_date, self.post.id)
+                with self.subTest(feed=name, direction=direction):
+                    _, rows_query = paginator.rows_query(cursor)
+                    self.assertIndexedPlan(rows_query[:settings.POSTS_SHOWN])
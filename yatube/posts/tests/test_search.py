@@ -0,0 +1,67 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post, User
+
+
+@skipUnless(search.is_supported(), 'Поиск FTS5 есть только в SQLite')
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Ежики гуляют по лесу')
+        cls.relevant_post = Post.objects.create(
+            author=cls.user, text='Ежики, ежики и снова ежики')
+        Post.objects.create(author=cls.user, text='Совсем про другое')
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_ranks_by_relevance(self):
+        """Поиск находит посты и ставит релевантные выше"""
+        self.assertEqual(self.search('ежики'),
+                         [self.relevant_post, self.post])
+
+    def test_search_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Белки прыгают по веткам'
+        post.save()
+        self.assertEqual(self.search('белки'), [post])
+        self.assertEqual(self.search('гуляют'), [])
+        post.delete()
+        self.assertEqual(self.search('белки'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Операторы FTS5 во вводе не ломают поиск"""
+        self.assertEqual(self.search('ежики" OR ('), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_rebuild_command_restores_index(self):
+        """rebuild_search_index восстанавливает потерянный индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) "
+                f"VALUES ('delete-all')")
+        self.assertEqual(self.search('лесу'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('лесу'), [self.post])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по индексу"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@test.ru', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'лесу'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.post])
@@ -1,9 +1,18 @@
-from django.test import Client, TestCase
+import datetime as dt
+import time
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from django.conf import settings
 from django import forms
+from django.core.cache import cache
 
+from ..cache import post_card_key
 from ..models import Post, User, Group
+from ..paginators import NEXT, PREVIOUS, encode_cursor
 
 TEST_POSTS_NUM = 13
 
@@ -25,6 +34,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
@@ -189,6 +199,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(cls.list_post)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
@@ -207,3 +218,383 @@ class PaginatorViewsTest(TestCase):
                 response = self.authorized_client.get(url)
                 self.assertEqual(len(response.context['page_obj']),
                                  settings.POSTS_SHOWN)
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Тестовый пост {post_num}')
+            for post_num in range(TEST_POSTS_NUM)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_cursor_pages_cover_feed(self):
+        """Переход по курсорам обходит всю ленту без повторов"""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': ''})
+        page_obj = response.context['page_obj']
+        seen = [post.id for post in page_obj]
+        self.assertEqual(len(seen), settings.POSTS_SHOWN)
+        self.assertFalse(page_obj.has_previous())
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': page_obj.next_cursor})
+        page_obj = response.context['page_obj']
+        seen += [post.id for post in page_obj]
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by('-pub_date', '-id')
+                 .values_list('id', flat=True)))
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': page_obj.previous_cursor})
+        self.assertEqual([post.id for post in response.context['page_obj']],
+                         seen[:settings.POSTS_SHOWN])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Некорректный курсор открывает первую страницу"""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'broken'})
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_previous())
+        self.assertEqual(len(page_obj), settings.POSTS_SHOWN)
+
+    def test_cursor_past_the_feed_shows_first_page(self):
+        """Курсор, за которым нет постов, открывает первую страницу"""
+        oldest = Post.objects.order_by('pub_date', 'id').first()
+        newest = Post.objects.order_by('-pub_date', '-id').first()
+        cursors = {
+            'next': encode_cursor(NEXT, oldest.pub_date, oldest.id),
+            'previous': encode_cursor(
+                PREVIOUS, newest.pub_date + dt.timedelta(days=1), 0),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(direction=name):
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'cursor': cursor})
+                page_obj = response.context['page_obj']
+                self.assertFalse(page_obj.has_previous())
+                self.assertEqual(page_obj[0], newest)
+                data = self.guest_client.get(
+                    reverse('posts:api_index'), {'cursor': cursor}).json()
+                self.assertIsNone(data['previous'])
+                self.assertEqual(data['results'][0]['id'], newest.id)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.user = User.objects.create_user(username='auth')
+        authors = [User.objects.create_user(username=f'author{num}')
+                   for num in range(TEST_POSTS_NUM)]
+        for author in authors:
+            Post.objects.create(author=author, text='Текст', group=cls.group)
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Тестовый пост {post_num}',
+                 group=cls.group)
+            for post_num in range(TEST_POSTS_NUM)
+        ])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_queries_do_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                # Первый запрос заполняет кеш числа постов ленты
+                self.client.get(url)
+                with override_settings(POSTS_SHOWN=2):
+                    small_page = self.count_queries(url)
+                with override_settings(POSTS_SHOWN=20):
+                    large_page = self.count_queries(url)
+                self.assertEqual(small_page, large_page)
+
+
+class FeedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        ]
+
+    def test_cached_feed_skips_post_query(self):
+        """Повторный показ ленты не запрашивает посты"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, self.post.text)
+                self.assertFalse([
+                    query for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                ])
+
+    def test_post_writes_update_cached_feed(self):
+        """Создание, правка и удаление поста обновляют ленты"""
+        for url in self.urls:
+            self.client.get(url)
+        post = Post.objects.create(
+            author=self.user, text='Второй пост', group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Второй пост')
+        post.text = 'Исправленный пост'
+        post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Исправленный')
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(self.client.get(url), 'Исправленный')
+
+    def test_cached_feed_keeps_personal_header(self):
+        """Закешированная лента показывает свою шапку каждому"""
+        self.client.get(self.urls[0])
+        response = self.authorized_client.get(self.urls[0])
+        self.assertContains(response, self.post.text)
+        self.assertContains(response, f'Пользователь: {self.user.username}')
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Второй пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def card_key(self, post):
+        return post_card_key(Post.objects.get(pk=post.pk), 'index')
+
+    def test_post_edit_invalidates_only_its_card(self):
+        """Правка поста сбрасывает только его карточку"""
+        self.client.get(reverse('posts:index'))
+        old_key = self.card_key(self.post)
+        other_key = self.card_key(self.other_post)
+        self.assertIsNotNone(cache.get(old_key))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Исправленный пост'},
+        )
+        self.assertIsNone(cache.get(old_key))
+        self.assertIsNotNone(cache.get(other_key))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+        self.assertContains(response, 'Второй пост')
+
+    def test_author_and_group_renames_refresh_cards(self):
+        """Переименование автора и группы обновляет карточки"""
+        group = Group.objects.create(title='Старая группа', slug='old-slug')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        self.authorized_client.get(reverse('posts:index'))
+        old_key = self.card_key(self.post)
+        other_key = self.card_key(self.other_post)
+        group.title, group.slug = 'Новая группа', 'new-slug'
+        group.save()
+        self.assertNotEqual(self.card_key(self.post), old_key)
+        self.assertEqual(self.card_key(self.other_post), other_key)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Переименованный'
+        user.save()
+        self.assertNotEqual(self.card_key(self.other_post), other_key)
+
+    def test_renames_refresh_cached_pages(self):
+        """После переименования ленты и страница поста не устаревают"""
+        group = Group.objects.create(title='Старая группа', slug='old-slug')
+        post = Post.objects.create(
+            author=self.user, text='Пост в группе', group=group)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        group = Group.objects.get(pk=group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Переименованный'
+        user.save()
+        urls.append(reverse('posts:group_list', kwargs={'slug': 'new-slug'}))
+        for url in urls:
+            with self.subTest(url=url):
+                headers = ({'HTTP_IF_NONE_MATCH': etags[url]}
+                           if url in etags else {})
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, '/group/old-slug/')
+                if url != urls[1]:
+                    self.assertContains(response, 'Переименованный')
+
+    def test_group_delete_refreshes_cached_pages(self):
+        """После удаления группы ленты и пост не ссылаются на нее"""
+        group = Group.objects.create(title='Группа', slug='gone-slug')
+        post = Post.objects.create(
+            author=self.user, text='Пост в группе', group=group)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Group.objects.get(pk=group.pk).delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, '/group/gone-slug/')
+
+    def test_login_keeps_cards(self):
+        """Вход пользователя не сбрасывает его карточки"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('pass')
+        user.save()
+        key = self.card_key(self.post)
+        self.client.login(username='auth', password='pass')
+        self.assertEqual(self.card_key(self.post), key)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group)
+
+    def setUp(self):
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Неизмененная страница отдает 304 без запроса постов"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_post_edit_changes_etag(self):
+        """Правка поста меняет ETag лент и страницы поста"""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и автор получают разные ETag"""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url)['ETag'],
+                                    authorized_client.get(url)['ETag'])
+
+    def test_new_post_of_author_refreshes_post_detail(self):
+        """Новый пост автора меняет страницу поста, хотя сам пост не менялся"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        Post.objects.create(author=self.user, text='Еще пост')
+        since = http_date(time.time() + 60)
+        for headers in ({'HTTP_IF_NONE_MATCH': etag},
+                        {'HTTP_IF_MODIFIED_SINCE': since}):
+            with self.subTest(headers=headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, 200)
+
+
+class AnonymousCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый текст')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_guest_gets_cached_response(self):
+        """Повторный запрос гостя обслуживается из кеша без SQL"""
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertLessEqual(len(queries), 1)
+        self.assertIn('public', second['Cache-Control'])
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_new_post_replaces_cached_response(self):
+        """Новый пост меняет версию и попадает в ответ гостю"""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='Совсем новый пост')
+        self.assertContains(self.client.get(url), 'Совсем новый пост')
+
+    def test_logged_in_user_bypasses_cache(self):
+        """Пользователь с сессией получает свежую страницу"""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertIn('private', response['Cache-Control'])
@@ -0,0 +1,149 @@
+"""Ленты подписок, собранные при записи поста.
+
+Пост автора раскладывается в TimelineEntry всех его подписчиков
+пачками по TIMELINE_FANOUT_BATCH. Авторы, у которых подписчиков
+больше TIMELINE_FANOUT_LIMIT, помечаются pull_timeline: их посты
+не раскладываются, а подмешиваются при чтении ленты. Раскладка идет
+в фоновой задаче posts.fan_out, запись поста ее только ставит в очередь.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from core.jobs import enqueue, job
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginators import PREVIOUS, CursorPaginator
+
+# По скольку дат искать посты без id за запрос (лимит параметров SQLite)
+POST_DATES_CHUNK = 500
+
+
+def follower_batches(author_id, size):
+    """id подписчиков автора списками по size, по возрастанию id."""
+    last_id = 0
+    while True:
+        rows = list(Follow.objects.filter(author_id=author_id, pk__gt=last_id)
+                    .order_by('pk').values_list('pk', 'user_id')[:size])
+        if not rows:
+            return
+        yield [user_id for _, user_id in rows]
+        last_id = rows[-1][0]
+
+
+def pull_authors(author_ids):
+    return set(AuthorStats.objects.filter(
+        author_id__in=author_ids, pull_timeline=True,
+    ).values_list('author_id', flat=True))
+
+
+def post_rows(author_posts):
+    """Пары (id, pub_date) постов одного автора.
+
+    После bulk_create в SQLite у постов нет id: находим ровно эти посты
+    по датам публикации, а не все посты автора между крайними датами.
+    """
+    rows = [(post.pk, post.pub_date) for post in author_posts if post.pk]
+    dates = sorted({post.pub_date for post in author_posts if not post.pk})
+    for start in range(0, len(dates), POST_DATES_CHUNK):
+        rows += Post.objects.filter(
+            author_id=author_posts[0].author_id,
+            pub_date__in=dates[start:start + POST_DATES_CHUNK],
+        ).values_list('pk', 'pub_date')
+    return rows
+
+
+def fan_out(posts):
+    """Раскладывает посты по лентам подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    skipped = pull_authors(by_author)
+    size = settings.TIMELINE_FANOUT_BATCH
+    for author_id, author_posts in by_author.items():
+        if author_id in skipped:
+            continue
+        rows = post_rows(author_posts)
+        for user_ids in follower_batches(author_id, size):
+            TimelineEntry.objects.bulk_create(
+                [TimelineEntry(user_id=user_id, post_id=pk,
+                               author_id=author_id, pub_date=pub_date)
+                 for user_id in user_ids for pk, pub_date in rows],
+                batch_size=size, ignore_conflicts=True,
+            )
+
+
+def enqueue_fan_out(posts):
+    """Ставит в очередь раскладку постов, по задаче на автора."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(
+            [post.pk, post.pub_date.isoformat()])
+    for author_id, rows in by_author.items():
+        enqueue('posts.fan_out', {'author_id': author_id, 'posts': rows})
+
+
+@job('posts.fan_out')
+def fan_out_job(payloads):
+    posts = [Post(pk=pk, author_id=payload['author_id'],
+                  pub_date=parse_datetime(pub_date))
+             for payload in payloads for pk, pub_date in payload['posts']]
+    # Пост могли удалить, пока задача ждала в очереди
+    existing = set(Post.objects.filter(
+        pk__in=[post.pk for post in posts if post.pk],
+    ).values_list('pk', flat=True))
+    fan_out([post for post in posts if not post.pk or post.pk in existing])
+
+
+def follow_started(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if pull_authors([author_id]):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date)
+         for pk, pub_date in posts[:settings.TIMELINE_BACKFILL]],
+        ignore_conflicts=True,
+    )
+
+
+def follow_stopped(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорные страницы ленты подписок пользователя.
+
+    Готовые записи читаются одним проходом по индексу
+    timeline_user_pub_date_idx; посты популярных авторов берутся
+    таким же курсорным запросом по индексу автора и сливаются с ними.
+    """
+
+    key_fields = ('pub_date', 'post_id')
+
+    def __init__(self, user, per_page):
+        entries = TimelineEntry.objects.filter(user=user).order_by(
+            '-pub_date', '-post_id')
+        super().__init__(entries, per_page)
+        self.user = user
+
+    def rows(self, cursor):
+        direction, entries = self.rows_query(cursor)
+        found = list(entries.values_list('pub_date', 'post_id')[
+            :self.per_page + 1])
+        authors = list(Follow.objects.filter(
+            user=self.user, author__stats__pull_timeline=True,
+        ).values_list('author_id', flat=True))
+        if authors:
+            pulled = CursorPaginator(
+                Post.objects.filter(author_id__in=authors), self.per_page)
+            found += pulled.rows_query(cursor)[1].values_list(
+                'pub_date', 'id')[:self.per_page + 1]
+        # Пост мог попасть в ленту до того, как автор стал популярным
+        found = sorted(set(found), reverse=direction != PREVIOUS)
+        ids = [pk for _, pk in found[:self.per_page + 1]]
+        posts = Post.objects.feed().in_bulk(ids)
+        return direction, [posts[pk] for pk in ids if pk in posts]
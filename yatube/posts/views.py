@@ -1,53 +1,187 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_POST
 
-from .models import Post, Group, User
+from core.decorators import cache_anonymous
+
+from .models import AuthorStats, Follow, Post, Group, User
 from .forms import PostForm
+from .groups import get_group_or_404, groups
+from .paginators import CachedCountPaginator, CursorPaginator, FeedPaginator
+from .search import SearchResults
+from .timeline import TimelinePaginator
+from .exports import CONTENT_TYPES, export_lines
+from .cache import (INDEX_FEED, author_feed, author_names, cached_feed_count,
+                    feed_page_key, feed_version, group_feed, group_names)
 
 from django.conf import settings
 
 
-def pagination(request, post_objs):
-    paginator = Paginator(post_objs, settings.POSTS_SHOWN)
+def pagination(request, post_objs, count=None, feed=None):
+    # Курсорный режим включается настройкой или переходом по курсору
+    if settings.POSTS_CURSOR_PAGINATION or 'cursor' in request.GET:
+        paginator = CursorPaginator(post_objs, settings.POSTS_SHOWN)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = CachedCountPaginator(post_objs, settings.POSTS_SHOWN,
+                                     count=count, feed=feed)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-def index(request):
-    posts = Post.objects.select_related('group').all()
-    page_obj = pagination(request, posts)
-    context = {
+def feed_page_context(request, page_obj, feed):
+    """Контекст страницы ленты с ключом ее кеша в шаблоне."""
+    return {
         'page_obj': page_obj,
+        'feed_page': feed_page_key(feed, page_obj, request),
+        'feed_cache_timeout': settings.POSTS_FEED_CACHE_TIMEOUT,
     }
+
+
+def feed_etag(request, feed):
+    """ETag ленты: версия меняется при любой записи поста ленты.
+
+    Шапка страницы зависит от пользователя, поэтому он тоже в ETag.
+    """
+    return f'{feed}-{feed_version(feed)}-{request.user.pk or 0}'
+
+
+def index_etag(request):
+    return feed_etag(request, INDEX_FEED)
+
+
+def group_etag(request, slug):
+    group = groups.get_by_slug(slug)
+    return group and feed_etag(request, group_feed(group.pk))
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    return author_id and feed_etag(request, author_feed(author_id))
+
+
+def post_validator(request, post_id):
+    """Время правки поста и число постов автора, один запрос на запрос."""
+    if not hasattr(request, '_post_validator'):
+        request._post_validator = Post.objects.filter(pk=post_id).values_list(
+            'updated_at', 'author__stats__posts_count', 'author_id',
+            'group_id').first()
+    return request._post_validator
+
+
+def post_etag(request, post_id):
+    row = post_validator(request, post_id)
+    if row is None:
+        return None
+    updated_at, posts_count, author_id, group_id = row
+    # Имя автора и название группы на странице меняются без правки поста
+    names = feed_version(author_names(author_id))
+    if group_id is not None:
+        names = f'{names}.{feed_version(group_names(group_id))}'
+    return (f'{updated_at.timestamp()}-{posts_count}-{names}-'
+            f'{request.user.pk or 0}')
+
+
+@condition(etag_func=index_etag)
+@cache_anonymous(index_etag)
+def index(request):
+    posts = Post.objects.feed()
+    page_obj = pagination(request, posts, feed=INDEX_FEED)
+    context = feed_page_context(request, page_obj, INDEX_FEED)
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_etag)
+@cache_anonymous(group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = pagination(request, posts)
+    group = get_group_or_404(slug)
+    posts = group.posts.feed()
+    feed = group_feed(group.pk)
+    # Группа из кеша без счетчика: его читаем из БД, только если
+    # число постов ленты выпало из кеша
+    posts_count = Group.objects.filter(pk=group.pk).values_list(
+        'posts_count', flat=True)
+    page_obj = pagination(request, posts, count=posts_count.get, feed=feed)
     context = {
         'group': group,
-        'page_obj': page_obj,
+        **feed_page_context(request, page_obj, feed),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=profile_etag)
+@cache_anonymous(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    page_obj = pagination(request, author.posts.all())
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    # Вся статистика заранее посчитана получателями сигналов Post:
+    # здесь только чтение готовых строк, без агрегатов по постам
+    stats = AuthorStats.of(author)
+    feed = author_feed(author.pk)
+    posts_count = cached_feed_count(feed, lambda: stats.posts_count)
+    page_obj = pagination(request, author.posts.feed(), count=posts_count,
+                          feed=feed)
     context = {
         'author': author,
-        'page_obj': page_obj,
+        'posts_count': posts_count,
+        'stats': stats,
+        'group_stats': author.group_stats.select_related('group'),
+        'month_stats': author.month_stats.all(),
+        'following': request.user.is_authenticated and Follow.objects.filter(
+            user=request.user, author=author).exists(),
+        **feed_page_context(request, page_obj, feed),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def export_response(request, posts, filename):
+    """Отдает посты файлом, не собирая всю выгрузку в памяти."""
+    fmt = request.GET.get('format')
+    if fmt not in CONTENT_TYPES:
+        fmt = 'csv'
+    response = StreamingHttpResponse(
+        export_lines(posts, fmt, settings.POSTS_EXPORT_CHUNK_SIZE),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"')
+    return response
+
+
+def group_export(request, slug):
+    group = get_group_or_404(slug)
+    return export_response(request, group.posts.all(), f'group-{slug}')
+
+
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    return export_response(request, author.posts.all(), f'posts-{username}')
+
+
+@cache_anonymous(index_etag)
+def search_posts(request):
+    query = request.GET.get('q', '')
+    paginator = FeedPaginator(SearchResults(query), settings.POSTS_SHOWN)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+# Без Last-Modified: число постов автора и имена на странице меняются
+# без правки поста, а If-Modified-Since сравнивал бы только updated_at
+@condition(etag_func=post_etag)
+@cache_anonymous(post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    # Обращение через related_name, чтобы не иcпользовать фильтр
-    posts_per_auth = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id)
+    # Число постов берем из счетчика автора, а не через COUNT(*)
+    posts_per_auth = AuthorStats.posts_count_of(post.author)
     context = {
         'post': post,
         'posts_per_auth': posts_per_auth,
@@ -78,3 +212,29 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', {'form': form,
                                                       'post': post,
                                                       'is_edit': True})
+
+
+@login_required
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, settings.POSTS_SHOWN)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    # delete() по одной строке, чтобы сработал сигнал post_delete
+    for follow in Follow.objects.filter(user=request.user, author=author):
+        follow.delete()
+    return redirect('posts:profile', username)
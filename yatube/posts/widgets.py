@@ -0,0 +1,49 @@
+from django import forms
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.urls import reverse_lazy
+
+from .groups import groups
+
+
+class SelectedGroupMixin:
+    """Отрисовывает среди вариантов только выбранную группу.
+
+    Остальные варианты виджет подгружает по мере ввода, поэтому размер
+    страницы не зависит от числа групп. Выбранную группу берем из кеша
+    групп, без запроса на каждую строку формы.
+    """
+
+    empty_label = '---------'
+
+    def optgroups(self, name, value, attrs=None):
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(
+                name, '', self.empty_label, not any(value), 0, attrs=attrs))
+        for pk in value:
+            group = groups.get_by_pk(int(pk)) if str(pk).isdigit() else None
+            if group is not None:
+                options.append(self.create_option(
+                    name, str(group.pk), str(group), True, len(options),
+                    attrs=attrs))
+        return [(None, options, 0)]
+
+
+class GroupAutocomplete(SelectedGroupMixin, forms.Select):
+    """Выбор группы на сайте: варианты приходят из posts:api_groups."""
+
+    url = reverse_lazy('posts:api_groups')
+
+    class Media:
+        js = ('js/group_autocomplete.js',)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = self.url
+        return attrs
+
+
+class GroupAdminAutocomplete(SelectedGroupMixin, AutocompleteSelect):
+    """Автодополнение групп в админке для autocomplete_fields."""
+
+    empty_label = ''
@@ -0,0 +1,43 @@
+// Выбор группы по первым буквам: список вариантов запрашивается
+// у сервера, в HTML формы приходит только выбранная группа.
+(function () {
+  'use strict';
+
+  function setup(select) {
+    var url = select.dataset.autocompleteUrl;
+    var input = document.createElement('input');
+    var timer = null;
+    input.type = 'search';
+    input.className = 'form-control mb-2';
+    input.placeholder = 'Начните вводить название группы';
+    input.setAttribute('aria-label', input.placeholder);
+    select.parentNode.insertBefore(input, select);
+
+    function show(results) {
+      var keep = Array.prototype.filter.call(select.options, function (option) {
+        return option.value === '' || option.selected;
+      });
+      select.innerHTML = '';
+      keep.forEach(function (option) { select.appendChild(option); });
+      results.forEach(function (group) {
+        if (String(group.id) === select.value) {
+          return;
+        }
+        select.appendChild(new Option(group.text, group.id));
+      });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        fetch(url + '?q=' + encodeURIComponent(input.value))
+          .then(function (response) { return response.json(); })
+          .then(function (data) { show(data.results); });
+      }, 250);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+  });
+})();
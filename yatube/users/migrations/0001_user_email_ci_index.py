@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Форма сброса пароля ищет пользователя по email__iexact:
+# в SQLite это LIKE, в PostgreSQL — UPPER(email) = UPPER(%s)
+INDEXES = {
+    'sqlite': 'CREATE INDEX IF NOT EXISTS user_email_ci_idx '
+              'ON auth_user (email COLLATE NOCASE)',
+    'postgresql': 'CREATE INDEX IF NOT EXISTS user_email_ci_idx '
+                  'ON auth_user (UPPER(email::text))',
+}
+
+
+def create_index(apps, schema_editor):
+    sql = INDEXES.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEXES:
+        schema_editor.execute('DROP INDEX IF EXISTS user_email_ci_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
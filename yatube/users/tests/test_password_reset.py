@@ -0,0 +1,43 @@
+from unittest import skipUnless
+
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import run_pending
+from posts.models import User
+from posts.tests.test_query_plans import explain
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    JOBS_EAGER=False,
+)
+class PasswordResetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', email='Auth@Yatube.ru', password='pass')
+
+    def test_reset_email_is_queued(self):
+        """Письмо для сброса пароля отправляет воркер, а не запрос"""
+        response = self.client.post(reverse('users:password_reset_form'),
+                                    {'email': 'auth@yatube.ru'})
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].recipients(), [self.user.email])
+        body = mail.outbox[0].message().get_payload(decode=True).decode()
+        self.assertIn('/auth/reset/', body)
+
+    @skipUnless(connection.vendor == 'sqlite',
+                'EXPLAIN QUERY PLAN есть только в SQLite')
+    def test_email_lookup_uses_index(self):
+        """Поиск по email без учета регистра идет по индексу"""
+        plan = explain(User.objects.filter(email__iexact='auth@yatube.ru'))
+        self.assertTrue(
+            [step for step in plan if 'user_email_ci_idx' in step], plan)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -49,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,7 +65,8 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, замеряющий время отрисовки для Server-Timing
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,10 +91,72 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Держим подключение открытым между запросами
+        'CONN_MAX_AGE': 60,
+    },
+    # Реплика для чтения, например копия файла основной базы:
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.sqlite3',
+    #     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+    #     'TEST': {'MIRROR': 'default'},
+    # },
+}
+
+# Псевдонимы баз из DATABASES, с которых читают представления
+DATABASE_REPLICAS = []
+# Сколько секунд после записи читать только основную базу
+DATABASE_PRIMARY_PIN_SECONDS = 15
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# PRAGMA для каждого нового подключения к SQLite (см. core.db).
+# WAL позволяет читать во время записи, busy_timeout ждет блокировку
+# вместо ошибки "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
+# Кеш общий для всех процессов сервера: на нем держатся сессии,
+# пользователи сессий, версии лент и сброс LRU-кешей групп. У LocMemCache
+# в каждом процессе свой кеш, и выход или смена пароля в одном воркере
+# не видны остальным. Для нескольких серверов нужен memcached:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+#         'LOCATION': '127.0.0.1:11211',
+#     },
+# }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'yatube_cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# manage.py test подменяет его на LocMemCache, pytest - в conftest.py
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# Сессии читаются из кеша, а пишутся и в кеш, и в базу
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Без запасного ModelBackend: неверный пароль проверяется один раз,
+# а не по разу в каждом бэкенде
+AUTHENTICATION_BACKENDS = [
+    'core.backends.CachedModelBackend',
+]
+
+# Сколько секунд хранить в кеше пользователя сессии
+USER_CACHE_TIMEOUT = 60 * 15
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -134,12 +200,81 @@ STATIC_URL = '/static/'
 # Constants for views
 
 POSTS_SHOWN = 10
+# Курсорная пагинация лент по (pub_date, id) вместо LIMIT/OFFSET
+POSTS_CURSOR_PAGINATION = False
+# Сколько секунд хранить в кеше число постов ленты
+POSTS_COUNT_CACHE_TIMEOUT = 60 * 60
+# Сколько секунд хранить отрисованные страницы лент
+POSTS_FEED_CACHE_TIMEOUT = 60 * 15
+# Сколько секунд хранить отрисованные карточки постов
+POSTS_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# По сколько строк читать из БД при выгрузке постов
+POSTS_EXPORT_CHUNK_SIZE = 2000
+# С какого числа подписчиков посты автора не раскладываются по лентам,
+# а подмешиваются при чтении ленты подписок
+TIMELINE_FANOUT_LIMIT = 10000
+# По скольку подписчиков раскладывать пост за один INSERT
+TIMELINE_FANOUT_BATCH = 1000
+# Сколько последних постов автора добавлять в ленту нового подписчика
+TIMELINE_BACKFILL = 100
+# Сколько групп отдавать за раз при выборе группы по первым буквам
+GROUP_AUTOCOMPLETE_SHOWN = 20
+# Дальше какой страницы автодополнение групп отдает пустой ответ
+GROUP_AUTOCOMPLETE_MAX_PAGE = 50
+# Сколько групп держать в LRU-кешах каждого процесса
+GROUP_CACHE_SIZE = 1000
+# Сколько секунд хранить целые страницы для гостей без cookie
+ANONYMOUS_CACHE_TIMEOUT = 60 * 5
+
+# Выполнять фоновые задачи сразу в enqueue(), без воркера run_jobs
+JOBS_EAGER = False
+# Сколько задач одного типа воркер берет за раз
+JOBS_BATCH_SIZE = 100
+# Сколько потоков выполняет задачи в run_jobs
+JOBS_WORKER_THREADS = 4
+# После стольких неудачных попыток задача остается в статусе failed
+JOBS_MAX_ATTEMPTS = 5
+# Задержка перед повтором в секундах, удваивается с каждой попыткой
+JOBS_RETRY_DELAY = 30
+# Через сколько секунд задачу, взятую упавшим воркером, берет другой
+JOBS_LOCK_TIMEOUT = 60 * 10
+
+# Запросы дольше стольких миллисекунд считаются медленными
+PERF_SLOW_REQUEST_MS = 500
+# Сколько последних медленных запросов держать в памяти
+PERF_SLOW_LOG_SIZE = 200
+# Журнал медленных запросов (с ротацией)
+PERF_SLOW_LOG_FILE = os.environ.get(
+    'YATUBE_SLOW_LOG', os.path.join(BASE_DIR, 'slow_requests.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': PERF_SLOW_LOG_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма кладутся в очередь задач, воркер run_jobs отправляет их пачками
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+#  воркер отправляет письма через движок filebased.EmailBackend
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')